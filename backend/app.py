@@ -183,7 +183,7 @@ class AgentWebSocket:
                 data=raw_data,
                 mode=self.app_state.current_mode
             )
-            self.app_state.command_history.append(command)
+            self.app_state.log_command(command)
 
             # Update last activity
             self.app_state.last_activity = datetime.now().isoformat()
@@ -236,7 +236,7 @@ class AgentWebSocket:
         """Build comprehensive context for LLM processing"""
 
         # Get recent command history (last 10 commands)
-        recent_history = self.app_state.command_history[-10:]
+        recent_history = self.app_state.recent_commands(10)
 
         context = LLMContext(
             current_message=incoming_message,
@@ -246,7 +246,7 @@ class AgentWebSocket:
             available_modes=self.AVAILABLE_MODES,
             session_info={
                 'session_duration': self._calculate_session_duration(),
-                'total_commands': len(self.app_state.command_history)
+                'total_commands': self.app_state.total_commands
             }
         )
 
@@ -254,11 +254,10 @@ class AgentWebSocket:
 
     def _calculate_session_duration(self) -> float:
         """Calculate how long the current session has been active"""
-        if not self.app_state.command_history:
+        if not self.app_state.first_command_at:
             return 0.0
 
-        first_command = self.app_state.command_history[0]
-        start_time = datetime.fromisoformat(first_command.timestamp)
+        start_time = datetime.fromisoformat(self.app_state.first_command_at)
         current_time = datetime.now()
         return (current_time - start_time).total_seconds()
 
@@ -459,7 +458,9 @@ EXAMPLES:
                     config=context.app_state.config,
                     active_session_id=context.app_state.active_session_id,
                     last_activity=context.app_state.last_activity,
-                    context_memory=enhanced_context_memory
+                    context_memory=enhanced_context_memory,
+                    total_commands=context.app_state.total_commands,
+                    first_command_at=context.app_state.first_command_at
                 )
                 
                 # Return enhanced context
@@ -490,7 +491,9 @@ EXAMPLES:
                     config=context.app_state.config,
                     active_session_id=context.app_state.active_session_id,
                     last_activity=context.app_state.last_activity,
-                    context_memory=enhanced_context_memory
+                    context_memory=enhanced_context_memory,
+                    total_commands=context.app_state.total_commands,
+                    first_command_at=context.app_state.first_command_at
                 )
                 
                 # Return enhanced context
@@ -572,10 +575,7 @@ EXAMPLES:
             structured_response = LLMResponse_Structured.model_validate_json(response_content)
             
             # Convert to our standard LLMResponse format (no more post-processing needed)
-            actions = [
-                OutgoingAction(action=action.action, data=action.data)
-                for action in structured_response.actions
-            ]
+            actions = convert_structured_to_actions(structured_response)
             
             return LLMResponse(
                 actions=actions,
@@ -787,7 +787,7 @@ BEHAVIOR:
                 data=action.data,
                 mode=self.app_state.current_mode
             )
-            self.app_state.command_history.append(command)
+            self.app_state.log_command(command)
 
             # Send the action to ALL connected clients
             action_dict = serialize_dataclass(action)
@@ -839,7 +839,7 @@ BEHAVIOR:
             logger.info("=== Command History (empty) ===")
             return
 
-        recent_commands = self.app_state.command_history[-limit:]
+        recent_commands = self.app_state.recent_commands(limit)
         logger.info(f"=== Last {len(recent_commands)} Commands ===")
 
         for i, cmd in enumerate(recent_commands, 1):
@@ -859,7 +859,7 @@ BEHAVIOR:
 
     def get_command_history(self, limit: int = 10) -> List[Any]:
         """Get recent command history"""
-        recent_commands = self.app_state.command_history[-limit:]
+        recent_commands = self.app_state.recent_commands(limit)
         return [serialize_dataclass(cmd) for cmd in recent_commands]
 
     async def start_server(self):
@@ -1,6 +1,8 @@
 from dataclasses import dataclass, field
-from typing import Dict, List, Any, Optional, Literal, Union
+from typing import Deque, Dict, List, Any, Optional, Literal, Union
 from datetime import datetime
+from collections import deque
+from itertools import islice
 try:
     from pydantic import BaseModel
 except ImportError:
@@ -82,16 +84,34 @@ class UserPreferences:
     language: str = "en"
     visual_style: str = "default"
 
+# Number of commands kept in AppState.command_history; older entries are dropped
+COMMAND_HISTORY_LIMIT = 512
+
 @dataclass
 class AppState:
     """Maintains the application state"""
     current_mode: AppMode = "conversational"
-    command_history: List[CommandHistory] = field(default_factory=list)
+    command_history: Deque[CommandHistory] = field(default_factory=lambda: deque(maxlen=COMMAND_HISTORY_LIMIT))
     user_preferences: UserPreferences = field(default_factory=UserPreferences)
     config: Config = field(default_factory=Config)
     active_session_id: Optional[str] = None
     last_activity: str = field(default_factory=lambda: datetime.now().isoformat())
     context_memory: Dict[str, Any] = field(default_factory=dict)
+    # Session totals, kept separately since command_history is bounded
+    total_commands: int = 0
+    first_command_at: Optional[str] = None
+
+    def log_command(self, command: CommandHistory) -> None:
+        """Append a command to the bounded history and update session totals"""
+        self.command_history.append(command)
+        self.total_commands += 1
+        if self.first_command_at is None:
+            self.first_command_at = command.timestamp
+
+    def recent_commands(self, limit: int) -> List[CommandHistory]:
+        """Return the last `limit` commands, oldest first"""
+        history = self.command_history
+        return list(islice(history, max(len(history) - limit, 0), None))
 
 @dataclass
 class LLMContext:
@@ -137,25 +157,27 @@ def create_action(action_type: ActionType, **data) -> OutgoingAction:
     )
 
 # Convenience functions for common actions
+# These build the data dict literally rather than going through create_action(**data),
+# which would collect the kwargs into a fresh dict on every call
 def create_tts_action(speech: str, voice_type: Optional[str] = None, speed: Optional[float] = None, volume: Optional[float] = None, closed_captions: Optional[bool] = None) -> OutgoingAction:
     """Create a TTS action"""
-    return create_action("tts", speech=speech, voice_type=voice_type, speed=speed, volume=volume, closed_captions=closed_captions)
+    return OutgoingAction(action="tts", data={"speech": speech, "voice_type": voice_type, "speed": speed, "volume": volume, "closed_captions": closed_captions})
 
 def create_tts_with_config(speech: str, config: Config) -> OutgoingAction:
     """Create a TTS action using a specific config"""
-    return create_action("tts", 
-                        speech=speech,
-                        voice_type=config.voice_type,
-                        volume=config.volume,
-                        closed_captions=config.closed_captions)
+    return OutgoingAction(action="tts", data={
+                        "speech": speech,
+                        "voice_type": config.voice_type,
+                        "volume": config.volume,
+                        "closed_captions": config.closed_captions})
 
 def create_config_action(config: Config) -> OutgoingAction:
     """Create a config send action"""
-    return create_action("config_send", 
-                        config_type=config.config_type,
-                        voice_type=config.voice_type, 
-                        volume=config.volume,
-                        closed_captions=config.closed_captions)
+    return OutgoingAction(action="config_send", data={
+                        "config_type": config.config_type,
+                        "voice_type": config.voice_type,
+                        "volume": config.volume,
+                        "closed_captions": config.closed_captions})
 
 def update_config(current_config: Config, **updates) -> Config:
     """Update config with new values"""
@@ -168,23 +190,25 @@ def update_config(current_config: Config, **updates) -> Config:
 
 def create_play_song_action(song_title: str, artist: Optional[str] = None, playlist: Optional[str] = None, volume: Optional[float] = None, video_url: Optional[str] = None) -> OutgoingAction:
     """Create a play song action"""
-    return create_action("play_song", song_title=song_title, artist=artist, playlist=playlist, volume=volume, video_url=video_url)
+    return OutgoingAction(action="play_song", data={"song_title": song_title, "artist": artist, "playlist": playlist, "volume": volume, "video_url": video_url})
 
 def create_play_video_action(video_url: str, title: Optional[str] = None, duration: Optional[int] = None, quality: Optional[str] = None) -> OutgoingAction:
     """Create a play video action"""
-    return create_action("play_video", video_url=video_url, title=title, duration=duration, quality=quality)
+    return OutgoingAction(action="play_video", data={"video_url": video_url, "title": title, "duration": duration, "quality": quality})
 
 def create_visual_action(visual_prompt: str, style: Optional[str] = None, duration: Optional[int] = None, animation_type: Optional[str] = None) -> OutgoingAction:
     """Create a visual creation action"""
-    return create_action("create_visual", visual_prompt=visual_prompt, style=style, duration=duration, animation_type=animation_type)
+    return OutgoingAction(action="create_visual", data={"visual_prompt": visual_prompt, "style": style, "duration": duration, "animation_type": animation_type})
 
 def create_error_action(error_message: str, error_code: Optional[str] = None) -> OutgoingAction:
     """Create an error action"""
-    return create_action("error", error_message=error_message, error_code=error_code)
+    return OutgoingAction(action="error", data={"error_message": error_message, "error_code": error_code})
 
 def convert_structured_to_actions(structured_response) -> List[OutgoingAction]:
     """Convert structured LLM response to list of OutgoingAction objects"""
-    if BaseModel and isinstance(structured_response, BaseModel):
+    # Exact type check instead of isinstance(..., BaseModel): a plain pointer compare,
+    # and LLMResponse_Structured is None (never matches) when pydantic isn't installed
+    if type(structured_response) is LLMResponse_Structured:
         # It's a Pydantic model, extract the actions
         return [
             OutgoingAction(action=action.action, data=action.data)
@@ -200,7 +224,7 @@ def serialize_dataclass(obj) -> Union[Dict[str, Any], List[Any], Any]:
     if hasattr(obj, '__dict__'):
         return {k: serialize_dataclass(v) if hasattr(v, '__dict__') else v
                 for k, v in obj.__dict__.items()}
-    elif isinstance(obj, list):
+    elif isinstance(obj, (list, deque)):
         return [serialize_dataclass(item) for item in obj]
     elif isinstance(obj, dict):
         return {k: serialize_dataclass(v) for k, v in obj.items()}
@@ -3,26 +3,64 @@ import sys
 import argparse
 import asyncio
 import json
-import tempfile
+import math
 import collections
+import queue
+import struct
+import threading
 import webrtcvad
 import sounddevice as sd
-import soundfile as sf
 import aiohttp
 import numpy as np
 import random
-import json
+import re
+from dataclasses import dataclass
+from typing import Optional
+from pathlib import Path
 from dotenv import load_dotenv
 from tts import TTSManager, VOICES
 
 # Import Groq for LLM integration
 try:
-    from groq import Groq
+    from groq import AsyncGroq
     GROQ_LLM_AVAILABLE = True
 except ImportError:
     print("groq package not installed. Install with: pip install groq")
     GROQ_LLM_AVAILABLE = False
 
+# orjson is optional; it encodes/decodes JSON (Groq responses, the reply cache) faster
+# than the stdlib json module. Both helpers work on bytes.
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+# uvloop is optional (it doesn't support Windows); it's a faster drop-in event loop
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+# Numba is optional; it JIT-compiles the silence check's sum of squares
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# onnxruntime is optional; it runs the Silero VAD model when --vad-model is given
+try:
+    import onnxruntime
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
 # Import data types
 try:
     from data_types import (
@@ -42,10 +80,10 @@ if not os.getenv("GROQ_API_KEY"):
     print("Warning: GROQ_API_KEY is not set in .env file. TTS and LLM will not work.", file=sys.stderr)
     print("Get a free API key at https://console.groq.com", file=sys.stderr)
 
-# Initialize Groq client for LLM responses
+# Initialize Groq client for LLM responses (async, so generation doesn't block the event loop)
 groq_client = None
 if GROQ_LLM_AVAILABLE and os.getenv("GROQ_API_KEY"):
-    groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    groq_client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
     print("✅ Groq LLM client initialized", file=sys.stderr)
 else:
     print("⚠️ Groq LLM not available. Using basic response generation.", file=sys.stderr)
@@ -54,11 +92,33 @@ else:
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_STT_ENDPOINT = os.getenv("GROQ_STT_ENDPOINT", "https://api.groq.com/openai/v1/audio/transcriptions")
 MODEL = "whisper-large-v3"
+# Upper bound on STT uploads in flight at once while listening continues
+MAX_CONCURRENT_TRANSCRIPTIONS = 4
+# Whole-request ceiling for Groq HTTP calls, so a stalled upload can't hold a slot forever
+HTTP_TIMEOUT_SECONDS = 30
+# Utterances captured while every upload slot is busy are sent as one clip (at most
+# this many, separated by a short silence) once a slot frees up
+MAX_BATCHED_UTTERANCES = 4
+UTTERANCE_GAP_SECONDS = 0.5
 SAMPLE_RATE = 16000
+# Recording starts once --start-frames of the last START_WINDOW_FRAMES VAD verdicts
+# are speech, so a single noisy frame doesn't open an utterance
+START_WINDOW_FRAMES = 5
+# Once VAD has heard this many speech frames in an utterance it can't be silence, so
+# the energy tally stops and the RMS silence check is skipped
+VAD_TRUSTED_SPEECH_FRAMES = 5
 CHANNELS = 1
 
-async def transcribe(audio_path: str, language: str, args):
-    """Sends the audio file to Groq for transcription, specifying the language."""
+async def transcribe(audio, language: str, args, filename: str = "audio.wav", release_slot=None,
+                     from_mic: bool = False):
+    """Sends audio to Groq for transcription, specifying the language.
+
+    audio is the in-memory WAV bytes from record_with_vad, or an open binary file
+    in --file mode. release_slot is given when the caller already holds an
+    args.stt_slots slot for this upload; it is called once the upload is done.
+    from_mic marks utterances captured by the listen loop, which can contain the
+    assistant's own voice.
+    """
     if not GROQ_API_KEY:
         print("Error: GROQ_API_KEY is not set.", file=sys.stderr)
         return
@@ -67,72 +127,164 @@ async def transcribe(audio_path: str, language: str, args):
     headers = {"Authorization": f"Bearer {GROQ_API_KEY}"}
 
     try:
-        async with aiohttp.ClientSession() as session:
-            with open(audio_path, "rb") as f:
-                form_data = aiohttp.FormData()
-                form_data.add_field("file", f, filename=os.path.basename(audio_path))
-                form_data.add_field("model", MODEL)
-                form_data.add_field("language", language)
-
-                async with session.post(GROQ_STT_ENDPOINT, headers=headers, data=form_data) as resp:
-                    if resp.status != 200:
-                        print(f"Error: API request failed with status {resp.status}", file=sys.stderr)
-                        print(f"Response: {await resp.text()}", file=sys.stderr)
-                        return
-
-                    response_json = await resp.json()
-                    transcript = response_json.get("text")
-
-                    # Handle the case where the API returns an empty string for silence
-                    if transcript is not None and transcript.strip():
-                        print(f">>> {transcript}")
-
-                        # Check if this is an interruption
-                        is_interruption = False
-                        transcript_lower = transcript.lower().strip()
-                        for keyword in INTERRUPTION_KEYWORDS:
-                            if keyword in transcript_lower:
-                                is_interruption = True
-                                print(f"Detected interruption with keyword: '{keyword}'", file=sys.stderr)
-                                break
-
-                        # If this is an interruption, stop any currently playing TTS
-                        if is_interruption and hasattr(args, 'current_tts') and args.current_tts:
-                            print("Interrupting current TTS playback", file=sys.stderr)
-                            try:
-                                import sounddevice as sd
-                                sd.stop()  # Stop any currently playing audio
-                                if hasattr(args.current_tts, 'stop_playback'):
-                                    args.current_tts.stop_playback()
-                                print("Successfully stopped audio playback", file=sys.stderr)
-                            except Exception as stop_error:
-                                print(f"Error stopping audio: {stop_error}", file=sys.stderr)
-
-                        # Generate a response using LLM if available
-                        response_text = await generate_response(transcript, args)
-                        print(f"<<< {response_text}")
-
-                        # Only attempt TTS if not disabled
-                        if not args.disable_tts:
-                            try:
-                                # Initialize TTS and speak the response
-                                tts = TTSManager(voice=args.tts_voice)
-                                # Store the current TTS instance to allow interruption
-                                args.current_tts = tts
-                                await tts.speak(response_text)
-                                args.current_tts = None  # Clear reference after finishing
-                            except Exception as tts_error:
-                                print(f"TTS error occurred but continuing: {tts_error}", file=sys.stderr)
-                                args.current_tts = None  # Clear reference on error
-                    else:
-                        # If transcript is empty or just whitespace, do nothing.
-                        print("Transcription empty, likely silence.", file=sys.stderr)
+        form_data = aiohttp.FormData()
+        form_data.add_field("file", audio, filename=filename)
+        form_data.add_field("model", MODEL)
+        form_data.add_field("language", language)
+
+        # Shared keep-alive session from main(), usually already warmed up by
+        # open_stt_connection while the user was still speaking. The semaphore keeps
+        # a slow API from piling up unbounded uploads behind the listener.
+        if release_slot is None:
+            await args.stt_slots.acquire()
+            release_slot = args.stt_slots.release
+        try:
+            async with args.http_session.post(GROQ_STT_ENDPOINT, headers=headers, data=form_data) as resp:
+                if resp.status != 200:
+                    print(f"Error: API request failed with status {resp.status}", file=sys.stderr)
+                    print(f"Response: {await resp.text()}", file=sys.stderr)
+                    return
+
+                response_json = json_loads(await resp.read())
+        finally:
+            release_slot()
+
+        transcript = response_json.get("text")
+
+        # Handle the case where the API returns an empty string for silence
+        if transcript is not None and transcript.strip():
+            print(f">>> {transcript}")
+
+            if from_mic and getattr(args, 'current_tts', None):
+                # The mic stays open during playback, so this is most likely the
+                # assistant's own voice, and replies routinely contain broad
+                # interruption words like "hi" or "no". Only an explicit stop word
+                # counts here, and it just stops playback: a spoken acknowledgement
+                # could itself contain a stop word and cut itself off. Anything else
+                # is dropped, since answering it would make the assistant talk to
+                # itself. Files are never echo; they wait their turn under reply_lock.
+                match = STOP_RE.search(transcript.lower())
+                if match:
+                    print(f"Stopping TTS playback on '{match.group(1)}'", file=sys.stderr)
+                    args.current_tts.stop_playback()
+                else:
+                    print("Ignoring speech during playback.", file=sys.stderr)
+                return
 
+            # Classify once; generate_response reuses the result
+            intent = classify_intent(transcript, args)
 
+            # If this is an interruption, stop any currently playing TTS
+            if intent.is_interruption and hasattr(args, 'current_tts') and args.current_tts:
+                print("Interrupting current TTS playback", file=sys.stderr)
+                try:
+                    # TTSManager plays on its own output stream, so sd.stop() wouldn't reach it
+                    if hasattr(args.current_tts, 'stop_playback'):
+                        args.current_tts.stop_playback()
+                    print("Successfully stopped audio playback", file=sys.stderr)
+                except Exception as stop_error:
+                    print(f"Error stopping audio: {stop_error}", file=sys.stderr)
+
+            # Replies are generated and spoken one at a time, in order. An interruption
+            # has already stopped the current playback above, so it won't wait long.
+            async with args.reply_lock:
+                # Generate a response using LLM if available
+                response_text = await generate_response(transcript, intent, args)
+                print(f"<<< {response_text}")
+
+                # Only attempt TTS if not disabled
+                if not args.disable_tts:
+                    try:
+                        # Speak the response with the TTSManager created once in main()
+                        tts = args.tts_manager
+                        # Store the current TTS instance to allow interruption
+                        args.current_tts = tts
+                        await tts.speak(response_text)
+                        args.current_tts = None  # Clear reference after finishing
+                    except Exception as tts_error:
+                        print(f"TTS error occurred but continuing: {tts_error}", file=sys.stderr)
+                        args.current_tts = None  # Clear reference on error
+        else:
+            # If transcript is empty or just whitespace, do nothing.
+            print("Transcription empty, likely silence.", file=sys.stderr)
 
     except Exception as e:
         print(f"An unexpected error occurred: {e}", file=sys.stderr)
 
+async def transcribe_file(path: str, args):
+    """Transcribes one audio file from disk (--file mode)."""
+    if not os.path.exists(path):
+        print(f"Error: Audio file not found at '{path}'", file=sys.stderr)
+        return
+    with open(path, "rb") as f:
+        await transcribe(f, args.language, args, filename=os.path.basename(path))
+
+async def dispatch_utterances(clips: asyncio.Queue, args, pending: set):
+    """Starts a transcribe() task per upload for utterances from the listen loop.
+
+    While every STT upload slot is busy, newly captured utterances wait here and are
+    then sent together as one clip (and answered as one turn), trading N round-trips
+    for one when speech arrives faster than Groq responds.
+    """
+    while True:
+        batch = [await clips.get()]
+        # Take a free upload slot and hand it to the task, so the next batch can't
+        # start until this upload has finished
+        await args.stt_slots.acquire()
+        while len(batch) < MAX_BATCHED_UTTERANCES and not clips.empty():
+            batch.append(clips.get_nowait())
+        if len(batch) > 1:
+            print(f"Sending {len(batch)} queued utterances together.", file=sys.stderr)
+        audio = batch[0] if len(batch) == 1 else join_wavs(batch)
+        release_slot = _release_once(args.stt_slots)
+        task = asyncio.create_task(transcribe(audio, args.language, args, release_slot=release_slot, from_mic=True))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        # Covers a task cancelled before it got as far as the upload
+        task.add_done_callback(lambda _: release_slot())
+
+def _release_once(semaphore: asyncio.Semaphore):
+    """Returns a callable that releases semaphore the first time it is called."""
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            semaphore.release()
+
+    return release
+
+async def open_stt_connection(session):
+    """Opens (and pools) the HTTPS connection to Groq's STT endpoint ahead of the upload.
+
+    The transcription endpoint needs the complete audio file, so the body can't be
+    streamed while the user is still talking. Doing the TCP + TLS handshake as soon
+    as speech starts still takes it off the end-of-speech latency path.
+    """
+    try:
+        async with session.head(GROQ_STT_ENDPOINT, headers={"Authorization": f"Bearer {GROQ_API_KEY}"}):
+            pass
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"Could not pre-open STT connection: {e!r}", file=sys.stderr)
+
+# Trigger phrases per response type, checked in this order (first match wins).
+# Each list is compiled into one alternation; the leading \b stops "get" matching
+# "forget" while still letting "explain" match "explaining".
+RESPONSE_TYPE_PHRASES = {
+    "story": ["tell me a story", "tell a story", "bedtime story", "once upon a time"],
+    "explanation": ["explain", "describe", "what is", "how does",
+                    "tell me about", "history of", "summarize",
+                    "detail", "why is", "how can", "teach me"],
+    "action": ["open", "play", "show", "start", "stop",
+               "pause", "resume", "turn on", "turn off",
+               "search for", "find", "get", "set", "change"],
+}
+RESPONSE_TYPE_PATTERNS = {
+    response_type: re.compile(r'\b(?:' + '|'.join(map(re.escape, phrases)) + ')')
+    for response_type, phrases in RESPONSE_TYPE_PHRASES.items()
+}
+
 def determine_response_length(transcript: str, args) -> tuple:
     """Determine the appropriate response type and length based on the user's request.
 
@@ -146,108 +298,176 @@ def determine_response_length(transcript: str, args) -> tuple:
     """
     transcript_lower = transcript.lower()
 
-    # Check for story requests
-    if any(phrase in transcript_lower for phrase in ["tell me a story", "tell a story", "bedtime story", "once upon a time"]):
-        return "story", args.story_tokens
-
-    # Check for explanation requests
-    if any(phrase in transcript_lower for phrase in ["explain", "describe", "what is", "how does",
-                                                    "tell me about", "history of", "summarize",
-                                                    "detail", "why is", "how can", "teach me"]):
-        return "explanation", args.explanation_tokens
-
-    # Check for action requests
-    if any(phrase in transcript_lower for phrase in ["open", "play", "show", "start", "stop",
-                                                    "pause", "resume", "turn on", "turn off",
-                                                    "search for", "find", "get", "set", "change"]):
-        return "action", args.action_tokens
+    for response_type, pattern in RESPONSE_TYPE_PATTERNS.items():
+        if pattern.search(transcript_lower):
+            return response_type, getattr(args, f"{response_type}_tokens")
 
     # Default to conversation
     return "conversation", args.conversation_tokens
 
 # List of interruption keywords that can stop playback - expanded for better detection
 INTERRUPTION_KEYWORDS = ["sorry", "stop", "wait", "pause", "hold", "cancel", "nevermind", "enough", "no", "quit", "end", "hey", "hi"]
+# All keywords in one pattern, matched as whole words so "hi" doesn't fire on "this"
+INTERRUPTION_RE = re.compile(r'\b(' + '|'.join(map(re.escape, INTERRUPTION_KEYWORDS)) + r')\b')
+# The only words that stop a reply while it is playing. Greetings and "no" are left
+# out because the mic also hears the assistant's own replies, which use them freely.
+STOP_KEYWORDS = ["stop", "wait", "pause", "cancel", "nevermind", "enough"]
+STOP_RE = re.compile(r'\b(' + '|'.join(map(re.escape, STOP_KEYWORDS)) + r')\b')
+
+@dataclass
+class IntentInfo:
+    """How a transcript should be answered, computed once per utterance"""
+    is_interruption: bool
+    response_type: str
+    max_tokens: int
+    keyword: Optional[str] = None
+
+def classify_intent(transcript: str, args) -> IntentInfo:
+    """Classify a transcript as an interruption or one of the response types.
+
+    Args:
+        transcript (str): The user's transcribed speech
+        args: Command line arguments with token limits
+
+    Returns:
+        IntentInfo: Interruption flag plus the response type and token limit to use
+    """
+    transcript_lower = transcript.lower().strip()
+    match = INTERRUPTION_RE.search(transcript_lower)
+    if match:
+        print(f"Detected interruption with keyword: '{match.group(1)}'", file=sys.stderr)
+        # For interruptions, force action response type (short)
+        return IntentInfo(True, "action", args.action_tokens, match.group(1))
+
+    response_type, max_tokens = determine_response_length(transcript_lower, args)
+    return IntentInfo(False, response_type, max_tokens)
+
+# System prompts for generate_response, keyed by response type (plus "interruption").
+# Kept as constants so every request for a type sends byte-identical prompt text,
+# which lets the provider reuse its cached prompt prefix.
+SYSTEM_PROMPTS = {
+    "interruption": """You are a sleep assistant designed to help users fall asleep through smart glasses.
+The user just interrupted you. Acknowledge the interruption with a gentle, calming voice.
+Keep your response to one very short sentence.
+Be soothing and understanding without promising capabilities you don't have.
+Focus only on sleep-related topics (relaxation, bedtime stories, calming sounds).
+Don't use markdown formatting or apologize.""",
+    "story": """You are a sleep assistant designed to help users fall asleep through smart glasses.
+The user is asking for a bedtime story. Provide a VERY SHORT soothing bedtime story.
+Begin like a traditional fairy tale ("Once upon a time...") and keep it extremely brief (2-3 sentences).
+Use calming imagery and peaceful endings to induce sleepiness.
+The story should be no more than a few sentences total.
+Keep it appropriate for all audiences and relaxing rather than exciting.
+Don't use markdown formatting.""",
+    "explanation": """You are a sleep assistant designed to help users fall asleep through smart glasses.
+If the topic is related to sleep, relaxation, or bedtime routines, provide a gentle explanation.
+If the topic is unrelated to sleep, gently redirect to sleep-related topics.
+Use a calm, soothing voice and avoid technical or stimulating content.
+Keep explanations brief and peaceful, focusing on helping the user relax.
+Don't use markdown formatting.""",
+    "action": """You are a sleep assistant designed to help users fall asleep through smart glasses.
+If the request is related to sleep (stories, relaxation, ambient sounds), respond positively.
+If the request is for something you cannot do, gently explain your focus is on helping them sleep.
+Never claim abilities you don't have (like controlling other devices or accessing the internet).
+Keep your response to one short, calming sentence.
+Don't use markdown formatting.""",
+    "conversation": """You are a sleep assistant designed to help users fall asleep through smart glasses.
+Your primary purpose is helping users relax and fall asleep through conversation.
+Only discuss topics that are calming and sleep-related.
+Gently redirect unrelated topics to sleep, relaxation, or bedtime themes.
+Keep answers concise (1-2 sentences max), soothing, and conducive to sleepiness.
+Never claim capabilities you don't have - you cannot control other devices, access the internet in real-time, or perform non-verbal actions.
+Don't use markdown formatting.""",
+}
+
+# LRU cache of LLM replies keyed by (prompt, max_tokens, normalized transcript).
+# Only short reply types are cached; stories and explanations should stay varied.
+# Keys are normalized, so "Thank you." and "thank you" share an entry. Matching is
+# exact otherwise: fuzzy matching let "i cant sleep" hit "i can sleep". The cache
+# is saved on shutdown so common turns stay warm across restarts.
+CACHEABLE_PROMPTS = {"interruption", "action", "conversation"}
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_PATH = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "sleep-assistant" / "response_cache.json"
+_response_cache = collections.OrderedDict()
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+
+def normalize_transcript(transcript: str) -> str:
+    """Lowercases and strips punctuation and extra whitespace for cache lookups."""
+    return " ".join(_NON_WORD_RE.sub("", transcript.lower()).split())
+
+def lookup_cached_response(prompt_key: str, max_tokens: int, text: str) -> Optional[str]:
+    """Returns the cached reply for this normalized transcript, if any."""
+    key = (prompt_key, max_tokens, text)
+    response_text = _response_cache.get(key)
+    if response_text is not None:
+        _response_cache.move_to_end(key)
+    return response_text
+
+def store_cached_response(prompt_key: str, max_tokens: int, text: str, response_text: str):
+    """Adds a reply to the LRU cache, evicting the least recently used entry when full."""
+    _response_cache[(prompt_key, max_tokens, text)] = response_text
+    _response_cache.move_to_end((prompt_key, max_tokens, text))
+    if len(_response_cache) > RESPONSE_CACHE_SIZE:
+        _response_cache.popitem(last=False)
+
+def load_response_cache():
+    """Loads replies saved by a previous run, if there are any."""
+    try:
+        with open(RESPONSE_CACHE_PATH, "rb") as f:
+            entries = json_loads(f.read())
+        for prompt_key, max_tokens, text, response_text in entries[-RESPONSE_CACHE_SIZE:]:
+            _response_cache[(prompt_key, max_tokens, text)] = response_text
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Could not load response cache: {e}", file=sys.stderr)
+
+def save_response_cache():
+    """Saves the cached replies so the next run starts warm."""
+    if not _response_cache:
+        return
+    try:
+        RESPONSE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(RESPONSE_CACHE_PATH, "wb") as f:
+            f.write(json_dumps([[*key, response_text] for key, response_text in _response_cache.items()]))
+    except OSError as e:
+        print(f"Could not save response cache: {e}", file=sys.stderr)
 
-async def generate_response(transcript: str, args) -> str:
+async def generate_response(transcript: str, intent: IntentInfo, args) -> str:
     """Generate a natural-sounding response based on the detected intent.
 
     Args:
         transcript (str): The detected user intent or transcribed text
+        intent (IntentInfo): Classification from classify_intent
         args: Command line arguments with token limits
 
     Returns:
         str: A natural-sounding response text
     """
-    # Check if this is an interruption
-    is_interruption = False
-    transcript_lower = transcript.lower().strip()
-    for keyword in INTERRUPTION_KEYWORDS:
-        if keyword in transcript_lower:
-            is_interruption = True
-            print(f"Detected interruption with keyword: '{keyword}'", file=sys.stderr)
-            break
-
     # Use Groq LLM if available
     if groq_client and GROQ_LLM_AVAILABLE:
         try:
             print(f"Generating LLM response for: {transcript}", file=sys.stderr)
 
-            # Determine appropriate response type and length
-            response_type, max_tokens = determine_response_length(transcript, args)
+            response_type, max_tokens = intent.response_type, intent.max_tokens
             print(f"Determined response type: {response_type}, max tokens: {max_tokens}", file=sys.stderr)
-
-            # For interruptions, force action response type (short)
-            if is_interruption:
-                response_type = "action"
-                max_tokens = args.action_tokens
+            if intent.is_interruption:
                 print("Interruption detected - using shorter response format", file=sys.stderr)
 
-            # Build a system prompt based on response type
-            if is_interruption:
-                system_prompt = """You are a sleep assistant designed to help users fall asleep through smart glasses.
-                The user just interrupted you. Acknowledge the interruption with a gentle, calming voice.
-                Keep your response to one very short sentence.
-                Be soothing and understanding without promising capabilities you don't have.
-                Focus only on sleep-related topics (relaxation, bedtime stories, calming sounds).
-                Don't use markdown formatting or apologize.
-                """
-            elif response_type == "story":
-                system_prompt = """You are a sleep assistant designed to help users fall asleep through smart glasses.
-                The user is asking for a bedtime story. Provide a VERY SHORT soothing bedtime story.
-                Begin like a traditional fairy tale ("Once upon a time...") and keep it extremely brief (2-3 sentences).
-                Use calming imagery and peaceful endings to induce sleepiness.
-                The story should be no more than a few sentences total.
-                Keep it appropriate for all audiences and relaxing rather than exciting.
-                Don't use markdown formatting.
-                """
-            elif response_type == "explanation":
-                system_prompt = """You are a sleep assistant designed to help users fall asleep through smart glasses.
-                If the topic is related to sleep, relaxation, or bedtime routines, provide a gentle explanation.
-                If the topic is unrelated to sleep, gently redirect to sleep-related topics.
-                Use a calm, soothing voice and avoid technical or stimulating content.
-                Keep explanations brief and peaceful, focusing on helping the user relax.
-                Don't use markdown formatting.
-                """
-            elif response_type == "action":
-                system_prompt = """You are a sleep assistant designed to help users fall asleep through smart glasses.
-                If the request is related to sleep (stories, relaxation, ambient sounds), respond positively.
-                If the request is for something you cannot do, gently explain your focus is on helping them sleep.
-                Never claim abilities you don't have (like controlling other devices or accessing the internet).
-                Keep your response to one short, calming sentence.
-                Don't use markdown formatting.
-                """
-            else:  # conversation
-                system_prompt = """You are a sleep assistant designed to help users fall asleep through smart glasses.
-                Your primary purpose is helping users relax and fall asleep through conversation.
-                Only discuss topics that are calming and sleep-related.
-                Gently redirect unrelated topics to sleep, relaxation, or bedtime themes.
-                Keep answers concise (1-2 sentences max), soothing, and conducive to sleepiness.
-                Never claim capabilities you don't have - you cannot control other devices, access the internet in real-time, or perform non-verbal actions.
-                Don't use markdown formatting.
-                """
+            # Short turns ("hello", "thank you", "stop") repeat a lot; reuse an earlier reply
+            prompt_key = "interruption" if intent.is_interruption else response_type
+            cacheable = prompt_key in CACHEABLE_PROMPTS
+            if cacheable:
+                normalized = normalize_transcript(transcript)
+                cached = lookup_cached_response(prompt_key, max_tokens, normalized)
+                if cached is not None:
+                    print("Using cached LLM response", file=sys.stderr)
+                    return cached
+
+            system_prompt = SYSTEM_PROMPTS[prompt_key]
 
             # Call Groq with the transcript
-            completion = groq_client.chat.completions.create(
+            completion = await groq_client.chat.completions.create(
                 model="llama-3.1-8b-instant",  # Using a fast model for real-time conversation
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -260,6 +480,8 @@ async def generate_response(transcript: str, args) -> str:
             # Extract the response text
             response_text = completion.choices[0].message.content.strip()
             print(f"LLM generated response: {response_text}", file=sys.stderr)
+            if cacheable:
+                store_cached_response(prompt_key, max_tokens, normalized, response_text)
             return response_text
 
         except Exception as e:
@@ -271,6 +493,69 @@ async def generate_response(transcript: str, args) -> str:
         # Use basic response generation if Groq LLM is not available
         return _basic_response_generation(transcript, args)
 
+# Fallback intents in priority order, each with the phrases that select it
+FALLBACK_PHRASES = {
+    "greeting": ["hello", "hi", "hey", "greetings"],
+    "capabilities": ["what can you do", "help me with", "your capabilities"],
+    "story": ["tell me a story", "bedtime story", "story", "fairy tale"],
+    "weather": ["weather"],
+    "time": ["time"],
+    "feelings": ["how are you", "how do you feel", "are you well"],
+    "thanks": ["thank you", "thanks", "appreciate it"],
+    "goodbye": ["goodbye", "bye", "see you", "talk to you later"],
+}
+FALLBACK_PATTERNS = {
+    intent: re.compile(r'\b(?:' + '|'.join(map(re.escape, phrases)) + ')')
+    for intent, phrases in FALLBACK_PHRASES.items()
+}
+
+# Canned replies per fallback intent; "default" covers unrecognized inputs
+FALLBACK_RESPONSES = {
+    "greeting": (
+        "Hello there. I'm your sleep assistant. Would you like a bedtime story or some relaxing sounds?",
+        "Hi there. I'm here to help you drift off to sleep. How can I make you comfortable tonight?",
+        "Hey. I'm your sleep companion. Would you like me to help you relax for bedtime?",
+    ),
+    "capabilities": (
+        "I'm your sleep assistant. I can tell you bedtime stories, have calming conversations, and help you relax as you drift off to sleep. What would you like me to do for you tonight?",
+    ),
+    "story": (
+        "Once upon a time, there was a peaceful forest where animals would gather each night to watch the stars twinkle. The gentle rhythm of their breathing would match the soft night breeze, lulling everyone into a deep, restful sleep.",
+        "Once upon a time, in a quiet village surrounded by soft rolling hills, there lived a kind shepherd who played a lullaby each night. The melody was so soothing that even the clouds would drift lower to listen as they passed overhead.",
+        "Once upon a time, there was a magical garden where flowers would softly hum lullabies as the moon rose. Their gentle melodies helped everyone nearby fall into peaceful dreams under the starlit sky.",
+    ),
+    "weather": (
+        "I can't check the weather, but I can help create a peaceful environment for sleep regardless of what's happening outside. Would you like a calming story instead?",
+        "Rather than discussing the weather, how about we focus on creating a cozy, relaxing atmosphere to help you drift off to sleep?",
+        "I don't have weather information, but I can help you relax and prepare for sleep. Would you like a bedtime story?",
+    ),
+    "time": (
+        "I don't have access to the time, but it's always a good moment to practice relaxation. Would you like me to help you prepare for sleep?",
+        "Instead of focusing on the time, let's concentrate on creating a peaceful mindset for sleep. Would you like a gentle story?",
+        "Time isn't important right now - what matters is helping you relax and drift into a peaceful sleep. How can I help you with that?",
+    ),
+    "feelings": (
+        "I'm here and ready to help you fall asleep peacefully. How are you feeling tonight? Ready to relax?",
+        "I'm perfectly calm and here to help you drift off to sleep. Are you feeling tired yet?",
+        "I'm always in a peaceful state, ready to help you find that same tranquility. How are you feeling?",
+    ),
+    "thanks": (
+        "You're welcome. Close your eyes and take a deep breath. I'll be here if you need anything else.",
+        "It's my pleasure. Relax and let yourself drift off whenever you're ready.",
+        "You're very welcome. May you have the most peaceful sleep.",
+    ),
+    "goodbye": (
+        "Goodnight. May you have the sweetest dreams and most restful sleep.",
+        "Sleep well. I'll be here whenever you need help falling asleep again.",
+        "Goodnight. Let your mind drift peacefully into dreams.",
+    ),
+    "default": (
+        "I'm your sleep assistant, here to help you relax and fall asleep. Would you like a bedtime story?",
+        "As your sleep companion, I focus on helping you drift off peacefully. Would you like me to help you relax?",
+        "I'm designed to help with sleep and relaxation. Would you like a calming bedtime story or gentle conversation?",
+    ),
+}
+
 def _basic_response_generation(transcript: str, args) -> str:
     """Basic rule-based response generation as fallback with a sleep-focused approach.
 
@@ -280,115 +565,221 @@ def _basic_response_generation(transcript: str, args) -> str:
     Returns:
         str: A natural-sounding response text
     """
-    # Map of patterns to friendly responses
     transcript_lower = transcript.lower().strip()
 
-    # Greeting patterns
-    if any(greeting in transcript_lower for greeting in ["hello", "hi", "hey", "greetings"]):
-        responses = [
-            "Hello there. I'm your sleep assistant. Would you like a bedtime story or some relaxing sounds?",
-            "Hi there. I'm here to help you drift off to sleep. How can I make you comfortable tonight?",
-            "Hey. I'm your sleep companion. Would you like me to help you relax for bedtime?"
-        ]
-        return random.choice(responses)
-
-    # Questions about capabilities
-    elif any(phrase in transcript_lower for phrase in ["what can you do", "help me with", "your capabilities"]):
-        return "I'm your sleep assistant. I can tell you bedtime stories, have calming conversations, and help you relax as you drift off to sleep. What would you like me to do for you tonight?"
-
-    # Story requests
-    elif any(phrase in transcript_lower for phrase in ["tell me a story", "bedtime story", "story", "fairy tale"]):
-        responses = [
-            "Once upon a time, there was a peaceful forest where animals would gather each night to watch the stars twinkle. The gentle rhythm of their breathing would match the soft night breeze, lulling everyone into a deep, restful sleep.",
-            "Once upon a time, in a quiet village surrounded by soft rolling hills, there lived a kind shepherd who played a lullaby each night. The melody was so soothing that even the clouds would drift lower to listen as they passed overhead.",
-            "Once upon a time, there was a magical garden where flowers would softly hum lullabies as the moon rose. Their gentle melodies helped everyone nearby fall into peaceful dreams under the starlit sky."
-        ]
-        return random.choice(responses)
-
-    # Weather-related (redirect to sleep)
-    elif "weather" in transcript_lower:
-        responses = [
-            "I can't check the weather, but I can help create a peaceful environment for sleep regardless of what's happening outside. Would you like a calming story instead?",
-            "Rather than discussing the weather, how about we focus on creating a cozy, relaxing atmosphere to help you drift off to sleep?",
-            "I don't have weather information, but I can help you relax and prepare for sleep. Would you like a bedtime story?"
-        ]
-        return random.choice(responses)
-
-    # Time-related (redirect to sleep)
-    elif "time" in transcript_lower:
-        responses = [
-            "I don't have access to the time, but it's always a good moment to practice relaxation. Would you like me to help you prepare for sleep?",
-            "Instead of focusing on the time, let's concentrate on creating a peaceful mindset for sleep. Would you like a gentle story?",
-            "Time isn't important right now - what matters is helping you relax and drift into a peaceful sleep. How can I help you with that?"
-        ]
-        return random.choice(responses)
-
-    # Feelings/emotions
-    elif any(phrase in transcript_lower for phrase in ["how are you", "how do you feel", "are you well"]):
-        responses = [
-            "I'm here and ready to help you fall asleep peacefully. How are you feeling tonight? Ready to relax?",
-            "I'm perfectly calm and here to help you drift off to sleep. Are you feeling tired yet?",
-            "I'm always in a peaceful state, ready to help you find that same tranquility. How are you feeling?"
-        ]
-        return random.choice(responses)
-
-    # Thanks
-    elif any(phrase in transcript_lower for phrase in ["thank you", "thanks", "appreciate it"]):
-        responses = [
-            "You're welcome. Close your eyes and take a deep breath. I'll be here if you need anything else.",
-            "It's my pleasure. Relax and let yourself drift off whenever you're ready.",
-            "You're very welcome. May you have the most peaceful sleep."
-        ]
-        return random.choice(responses)
-
-    # Goodbye
-    elif any(phrase in transcript_lower for phrase in ["goodbye", "bye", "see you", "talk to you later"]):
-        responses = [
-            "Goodnight. May you have the sweetest dreams and most restful sleep.",
-            "Sleep well. I'll be here whenever you need help falling asleep again.",
-            "Goodnight. Let your mind drift peacefully into dreams."
-        ]
-        return random.choice(responses)
-
-    # Default responses for unrecognized inputs
+    intent = "default"
+    for candidate, pattern in FALLBACK_PATTERNS.items():
+        if pattern.search(transcript_lower):
+            intent = candidate
+            break
+
+    responses = FALLBACK_RESPONSES[intent]
+    return responses[random.randrange(len(responses))]
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _sum_of_squares(samples):
+        total = 0
+        for x in samples:
+            total += np.int64(x) * x
+        return total
+else:
+    def _sum_of_squares(samples):
+        # Accumulates in int64 straight off the int16 samples, without materializing a
+        # float32 copy (np.dot/np.vdot would overflow in int16)
+        return np.einsum('i,i->', samples, samples, dtype=np.int64)
+
+class SileroVad:
+    """Silero VAD (v5 ONNX model) behind webrtcvad's is_speech(buf, sample_rate) interface.
+
+    Silero scores fixed 512-sample windows, so incoming frames are re-blocked into
+    windows and each frame reports the probability of the latest scored window.
+    All conversion happens in preallocated float32 buffers.
+    """
+    WINDOW = 512
+    CONTEXT = 64
+
+    def __init__(self, model_path: str, threshold: float = 0.5):
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = 1
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.threshold = threshold
+        self.state = np.zeros((2, 1, 128), dtype=np.float32)
+        self.sr = np.array(SAMPLE_RATE, dtype=np.int64)
+        # Model input: the last CONTEXT samples of the previous window, then WINDOW new ones
+        self.window = np.zeros((1, self.CONTEXT + self.WINDOW), dtype=np.float32)
+        # Samples not yet scored; never more than a window plus one 30 ms frame
+        self.pending = np.empty(2 * self.WINDOW, dtype=np.float32)
+        self.n_pending = 0
+        self.probability = 0.0
+
+    def is_speech(self, buf, sample_rate: int) -> bool:
+        frame = np.frombuffer(buf, dtype=np.int16)
+        end = self.n_pending + frame.size
+        np.multiply(frame, 1 / 32768, out=self.pending[self.n_pending:end])
+        self.n_pending = end
+
+        while self.n_pending >= self.WINDOW:
+            self.window[0, self.CONTEXT:] = self.pending[:self.WINDOW]
+            output, self.state = self.session.run(
+                None, {"input": self.window, "state": self.state, "sr": self.sr}
+            )
+            self.probability = float(output[0, 0])
+            self.window[0, :self.CONTEXT] = self.window[0, -self.CONTEXT:]
+            self.n_pending -= self.WINDOW
+            self.pending[:self.n_pending] = self.pending[self.WINDOW:self.WINDOW + self.n_pending]
+
+        return self.probability >= self.threshold
+
+# Canonical 44-byte RIFF/WAVE header for mono 16-bit PCM at SAMPLE_RATE. Everything
+# but the two size fields is constant, so the header is packed once at import and
+# wav_bytes only patches the sizes in.
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+WAV_HEADER_TEMPLATE = WAV_HEADER.pack(
+    b"RIFF", 0, b"WAVE",
+    b"fmt ", 16, 1, CHANNELS, SAMPLE_RATE, SAMPLE_RATE * CHANNELS * 2, CHANNELS * 2, 16,
+    b"data", 0,
+)
+WAV_SIZE_FIELD = struct.Struct("<I")
+WAV_RIFF_SIZE_OFFSET = 4
+WAV_DATA_SIZE_OFFSET = WAV_HEADER.size - 4
+
+def wav_bytes(pcm: np.ndarray) -> bytearray:
+    """Wraps int16 PCM samples in a WAV container, without going through libsndfile."""
+    data_size = pcm.size * 2
+    wav = bytearray(WAV_HEADER.size + data_size)
+    wav[:WAV_HEADER.size] = WAV_HEADER_TEMPLATE
+    WAV_SIZE_FIELD.pack_into(wav, WAV_RIFF_SIZE_OFFSET, WAV_HEADER.size - 8 + data_size)
+    WAV_SIZE_FIELD.pack_into(wav, WAV_DATA_SIZE_OFFSET, data_size)
+    wav[WAV_HEADER.size:] = memoryview(pcm).cast('B')
+    return wav
+
+def join_wavs(clips: list) -> bytearray:
+    """Concatenates wav_bytes clips into one WAV, with UTTERANCE_GAP_SECONDS of silence between them."""
+    gap = np.zeros(int(UTTERANCE_GAP_SECONDS * SAMPLE_RATE), dtype=np.int16)
+    parts = []
+    for clip in clips:
+        if parts:
+            parts.append(gap)
+        parts.append(np.frombuffer(clip, dtype=np.int16, offset=WAV_HEADER.size))
+    return wav_bytes(np.concatenate(parts))
+
+def prepare_capture_args(args):
+    """Derives the VAD frame constants and capture buffers from the CLI options once per process.
+
+    record_with_vad reads these from args instead of recomputing or reallocating them
+    per utterance. It runs one capture at a time and copies the finished WAV out of
+    the buffers, so reusing them across utterances is safe.
+    """
+    args.frame_size = int(SAMPLE_RATE * args.frame_duration / 1000)
+    args.pre_buffer_frames = int(args.pre_buffer * SAMPLE_RATE / args.frame_size)
+    args.max_silent_frames = int(args.silence_duration * SAMPLE_RATE / args.frame_size)
+    args.max_samples = int(args.max_utterance_seconds * SAMPLE_RATE) + args.pre_buffer_frames * args.frame_size
+
+    if args.vad_model and not ONNXRUNTIME_AVAILABLE:
+        print("onnxruntime not installed; using WebRTC VAD. Install with: pip install onnxruntime", file=sys.stderr)
+    if args.vad_model and ONNXRUNTIME_AVAILABLE:
+        args.vad = SileroVad(args.vad_model, args.vad_threshold)
     else:
-        responses = [
-            "I'm your sleep assistant, here to help you relax and fall asleep. Would you like a bedtime story?",
-            "As your sleep companion, I focus on helping you drift off peacefully. Would you like me to help you relax?",
-            "I'm designed to help with sleep and relaxation. Would you like a calming bedtime story or gentle conversation?"
-        ]
-        return random.choice(responses)
-
-def record_with_vad(args):
-    """Records from the microphone using VAD and returns a filepath or None if silent."""
-    vad = webrtcvad.Vad(args.aggressiveness)
-    frame_size = int(SAMPLE_RATE * args.frame_duration / 1000)
-
-    pre_buffer_frames = int(args.pre_buffer * SAMPLE_RATE / frame_size)
-    ring_buffer = collections.deque(maxlen=pre_buffer_frames)
-
-    recorded_frames = []
+        args.vad = webrtcvad.Vad(args.aggressiveness)
+    # Utterance samples (pre-buffer included) are copied straight into one int16
+    # buffer, rather than collected as per-frame bytes and joined afterwards
+    args.capture_samples = np.empty(args.max_samples, dtype=np.int16)
+    # Slots the stream callback copies frames into: the pre-buffer plus a second of
+    # backlog before a slot is reused
+    pool_slots = args.pre_buffer_frames + SAMPLE_RATE // args.frame_size + 1
+    args.frame_pool = np.empty((pool_slots, args.frame_size), dtype=np.int16)
+    # Byte views for webrtcvad, which takes the frame length from len(buf) // 2
+    args.frame_pool_bytes = [memoryview(frame).cast('B') for frame in args.frame_pool]
+
+def record_with_vad(args, on_speech_start=None):
+    """Records from the microphone using VAD and returns the utterance as WAV bytes, or None if silent.
+
+    on_speech_start, if given, is called (from this thread) as soon as VAD first detects
+    speech, before the rest of the utterance has been captured.
+    """
+    vad = args.vad
+    frame_size = args.frame_size
+    max_silent_frames = args.max_silent_frames
+    max_samples = args.max_samples
+    start_frames = args.start_frames
+    start_mask = (1 << START_WINDOW_FRAMES) - 1
+
+    ring_buffer = collections.deque(maxlen=args.pre_buffer_frames)
+
+    samples = args.capture_samples
+    n_samples = 0
+    total_frames = 0
+    # VAD verdicts and signal energy are tallied as frames arrive, so the silence and
+    # speech-ratio checks below never make another pass over the recording
+    speech_frames = 0
+    sum_squares = 0
     is_recording = False
+    # Bitmap of the latest VAD verdicts before recording starts, newest in bit 0
+    speech_history = 0
     silent_frames_after_speech = 0
-    max_silent_frames = int(args.silence_duration * SAMPLE_RATE / frame_size)
+
+    # PortAudio delivers each frame on its own thread; the VAD loop below just
+    # consumes from this queue instead of blocking in stream.read() per frame.
+    # The callback copies each frame into the next slot of the frame pool and
+    # queues the slot index, so capture allocates no per-frame bytes.
+    audio_queue = queue.SimpleQueue()
+    pool = args.frame_pool
+    pool_bytes = args.frame_pool_bytes
+    pool_slots = len(pool)
+    next_slot = 0
+
+    def _on_audio(indata, frames, time_info, status):
+        nonlocal next_slot
+        if status:
+            print(f"Audio input status: {status}", file=sys.stderr)
+        pool[next_slot] = np.frombuffer(indata, dtype=np.int16)
+        audio_queue.put_nowait(next_slot)
+        next_slot = (next_slot + 1) % pool_slots
 
     print("Listening... (speak to start recording)", file=sys.stderr)
 
-    with sd.InputStream(samplerate=SAMPLE_RATE, channels=CHANNELS, blocksize=frame_size, dtype='int16') as stream:
+    with sd.RawInputStream(samplerate=SAMPLE_RATE, channels=CHANNELS, blocksize=frame_size, dtype='int16',
+                           latency='low', callback=_on_audio):
         while True:
-            frame, _ = stream.read(frame_size)
-            frame_bytes = frame.tobytes()
-            is_speech = vad.is_speech(frame_bytes, SAMPLE_RATE)
+            # Checked on every frame: a live mic keeps the queue busy, so waiting for
+            # it to run dry would never notice the listener shutting down
+            if args.stop_listening.is_set():
+                return None
+            try:
+                slot = audio_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            is_speech = vad.is_speech(pool_bytes[slot], SAMPLE_RATE)
 
             if not is_recording:
-                ring_buffer.append(frame_bytes)
-                if is_speech:
+                ring_buffer.append(slot)
+                speech_history = ((speech_history << 1) | is_speech) & start_mask
+                if is_speech and bin(speech_history).count("1") >= start_frames:
                     is_recording = True
                     print("Speech detected, recording...", file=sys.stderr)
-                    recorded_frames.extend(list(ring_buffer))
+                    if on_speech_start:
+                        on_speech_start()
+                    for buffered in ring_buffer:
+                        samples[n_samples:n_samples + frame_size] = pool[buffered]
+                        sum_squares += int(_sum_of_squares(pool[buffered]))
+                        n_samples += frame_size
+                    total_frames = len(ring_buffer)
+                    # Earlier frames in the pre-buffer were non-speech, bar those in the start window
+                    speech_frames = min(bin(speech_history).count("1"), total_frames)
                     ring_buffer.clear()
             else:
-                recorded_frames.append(frame_bytes)
+                samples[n_samples:n_samples + frame_size] = pool[slot]
+                if speech_frames < VAD_TRUSTED_SPEECH_FRAMES:
+                    sum_squares += int(_sum_of_squares(pool[slot]))
+                n_samples += frame_size
+                total_frames += 1
+                if n_samples + frame_size > max_samples:
+                    print("Maximum utterance length reached.", file=sys.stderr)
+                    break
                 if not is_speech:
                     silent_frames_after_speech += 1
                     if silent_frames_after_speech > max_silent_frames:
@@ -396,51 +787,51 @@ def record_with_vad(args):
                         break
                 else:
                     silent_frames_after_speech = 0
+                    speech_frames += 1
 
-    if not recorded_frames:
+    if n_samples == 0:
         return None
 
-    recording_bytes = b''.join(recorded_frames)
-    recording_array = np.frombuffer(recording_bytes, dtype=np.int16)
+    recording_array = samples[:n_samples]
 
     # --- Silence Check ---
-    # Calculate the Root Mean Square (RMS) energy of the audio
-    rms = np.sqrt(np.mean(recording_array.astype(np.float32)**2))
+    # Only needed for captures VAD isn't already sure about; the running sum of
+    # squares covers every frame in that case
+    if speech_frames < VAD_TRUSTED_SPEECH_FRAMES:
+        # Root Mean Square (RMS) energy of the audio, from the running sum of squares
+        rms = math.sqrt(sum_squares / n_samples)
 
-    # More aggressive silence detection to avoid false triggers
-    if rms < args.energy_threshold:
-        print(f"Silent audio detected (RMS: {rms:.2f}), ignoring.", file=sys.stderr)
-        return None
+        # More aggressive silence detection to avoid false triggers
+        if rms < args.energy_threshold:
+            print(f"Silent audio detected (RMS: {rms:.2f}), ignoring.", file=sys.stderr)
+            return None
 
     # Additional filtering to avoid false detections
     # Check if enough of the frames contain actual speech
-    speech_frames = 0
-    total_frames = len(recorded_frames)
-    for frame_bytes in recorded_frames:
-        if vad.is_speech(frame_bytes, SAMPLE_RATE):
-            speech_frames += 1
-
     speech_ratio = speech_frames / total_frames
     if speech_ratio < 0.2:  # Require at least 20% of frames to contain speech
         print(f"Low speech content detected ({speech_ratio:.2f}), ignoring.", file=sys.stderr)
         return None
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-        sf.write(tmp_file.name, recording_array, SAMPLE_RATE)
-        return tmp_file.name
+    # Encode the WAV in memory; transcribe() uploads it straight from these bytes
+    return wav_bytes(recording_array)
 
 async def main():
     parser = argparse.ArgumentParser(description="A continuous STT client for Groq using VAD.")
 
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("-l", "--listen", action="store_true", help="Listen continuously and transcribe speech automatically.")
-    group.add_argument("-f", "--file", type=str, help="Path to an audio file to transcribe (one-shot).")
+    group.add_argument("-f", "--file", type=str, nargs="+", help="Path(s) to audio files to transcribe (one-shot, uploaded concurrently).")
 
     vad_group = parser.add_argument_group('VAD & Audio Tuning')
     vad_group.add_argument("--aggressiveness", type=int, default=3, choices=range(4), help="VAD aggressiveness (0-3).")
     vad_group.add_argument("--silence-duration", type=float, default=0.7, help="Seconds of silence to wait before stopping.")
     vad_group.add_argument("--frame-duration", type=int, default=30, choices=[10, 20, 30], help="Duration of each audio frame in ms.")
     vad_group.add_argument("--pre-buffer", type=float, default=0.3, help="Seconds of audio to keep before speech starts.")
+    vad_group.add_argument("--start-frames", type=int, default=3, choices=range(1, START_WINDOW_FRAMES + 1), help=f"Speech frames needed within the last {START_WINDOW_FRAMES} to start recording.")
+    vad_group.add_argument("--max-utterance-seconds", type=float, default=30.0, help="Longest utterance to record before sending it for transcription.")
+    vad_group.add_argument("--vad-model", type=str, default=None, help="Path to a Silero VAD ONNX model to use instead of WebRTC VAD (needs onnxruntime).")
+    vad_group.add_argument("--vad-threshold", type=float, default=0.5, help="Speech probability above which Silero VAD counts a frame as speech.")
     parser.add_argument("--energy-threshold", type=float, default=100.0, help="RMS energy threshold to consider audio as non-silent (higher = less sensitive).")
     parser.add_argument("--use-llm", action="store_true", help="Use Groq LLM for response generation (if available).")
 
@@ -459,31 +850,81 @@ async def main():
     token_group.add_argument("--action-tokens", type=int, default=40, help="Maximum tokens for action confirmations (very brief).")
 
     args = parser.parse_args()
+    prepare_capture_args(args)
+
+    # Pay the Numba compile (or cache load) now rather than on the first utterance
+    if NUMBA_AVAILABLE:
+        _sum_of_squares(np.zeros(1, dtype=np.int16))
+
+    load_response_cache()
 
     # Initialize variable to track current TTS playback
     args.current_tts = None
+    # One TTSManager for the whole run rather than one per utterance
+    args.tts_manager = None if args.disable_tts else TTSManager(voice=args.tts_voice)
+    # Lets the recording thread exit when the listener shuts down
+    args.stop_listening = threading.Event()
+    # Serializes reply generation + playback across overlapping transcribe() tasks
+    args.reply_lock = asyncio.Lock()
+    # Bounds concurrent STT uploads across transcribe() tasks
+    args.stt_slots = asyncio.Semaphore(MAX_CONCURRENT_TRANSCRIPTIONS)
+    # In-flight transcribe() tasks (and the listen-mode dispatcher), so they can be
+    # cancelled on shutdown
+    pending = set()
+    # One pooled, keep-alive HTTP session for every Groq request, so the TCP + TLS
+    # handshake is paid once per process instead of once per utterance. The pool has
+    # room for every upload slot plus the warm-up requests alongside them.
+    args.http_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=2 * MAX_CONCURRENT_TRANSCRIPTIONS, ttl_dns_cache=300, keepalive_timeout=60),
+        timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SECONDS),
+    )
 
-    if args.listen:
-        print("Starting continuous listening mode. Press Ctrl+C to stop.", file=sys.stderr)
-        try:
-            while True:
-                temp_audio_path = None
-                try:
-                    temp_audio_path = record_with_vad(args)
-                    if temp_audio_path:
-                        await transcribe(temp_audio_path, args.language, args)
-                finally:
-                    if temp_audio_path and os.path.exists(temp_audio_path):
-                        os.remove(temp_audio_path)
-                print("\nListening for next utterance...", file=sys.stderr)
-        except KeyboardInterrupt:
-            print("\nStopping listener.", file=sys.stderr)
-
-    elif args.file:
-        if not os.path.exists(args.file):
-            print(f"Error: Audio file not found at '{args.file}'", file=sys.stderr)
-            return
-        await transcribe(args.file, args.language, args)
+    try:
+        if args.listen:
+            print("Starting continuous listening mode. Press Ctrl+C to stop.", file=sys.stderr)
+            loop = asyncio.get_running_loop()
+            clips = asyncio.Queue()
+            dispatcher = asyncio.create_task(dispatch_utterances(clips, args, pending))
+            pending.add(dispatcher)
+            try:
+                def start_warmup():
+                    # Not awaited: the upload reuses the pooled connection once the
+                    # warm-up has opened it, and a slow network shouldn't hold the mic
+                    warmup = asyncio.ensure_future(open_stt_connection(args.http_session))
+                    pending.add(warmup)
+                    warmup.add_done_callback(pending.discard)
+
+                def on_speech_start():
+                    loop.call_soon_threadsafe(start_warmup)
+
+                while True:
+                    # Record on a worker thread so the connection warm-up can run meanwhile
+                    audio = await asyncio.to_thread(record_with_vad, args, on_speech_start)
+                    if audio is not None:
+                        # Don't wait for the reply: go straight back to listening so the
+                        # next utterance (e.g. an interruption) is captured during playback
+                        clips.put_nowait(audio)
+                    print("\nListening for next utterance...", file=sys.stderr)
+            except KeyboardInterrupt:
+                print("\nStopping listener.", file=sys.stderr)
+            finally:
+                args.stop_listening.set()
+
+        elif args.file:
+            # Uploads overlap on the shared session, bounded by args.stt_slots; replies
+            # are still spoken one at a time under args.reply_lock
+            await asyncio.gather(*(transcribe_file(path, args) for path in args.file))
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        await args.http_session.close()
+        save_response_cache()
+        if args.tts_manager:
+            await args.tts_manager.close()
+            args.tts_manager.clean_up()
 
 if __name__ == "__main__":
+    if UVLOOP_AVAILABLE:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main())
@@ -1,10 +1,43 @@
 import asyncio
 import json
+import sys
 import websockets
 import time
-from datetime import datetime
 from typing import Dict, Any, Optional
 
+# orjson is optional; it encodes/decodes test messages faster than the stdlib json
+# module. Messages still go out as text frames, like the server's own.
+try:
+    import orjson
+    json_loads = orjson.loads
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
+# uvloop is optional (it doesn't support Windows); it's a faster drop-in event loop
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+# Log timestamps only change their HH:MM:SS part once a second, so that part is
+# formatted once and reused; each call just appends the milliseconds
+_ts_second = None
+_ts_prefix = ""
+
+def _ts() -> str:
+    """Current local time as HH:MM:SS.mmm for log lines"""
+    global _ts_second, _ts_prefix
+    second, ns = divmod(time.time_ns(), 1_000_000_000)
+    if second != _ts_second:
+        _ts_second = second
+        _ts_prefix = time.strftime("%H:%M:%S", time.localtime(second))
+    return f"{_ts_prefix}.{ns // 1_000_000:03d}"
+
 class TestClient:
     """Test client for connecting to and testing the AgentWebSocket server"""
 
@@ -15,19 +48,33 @@ class TestClient:
         self.websocket: Optional[websockets.WebSocketClientProtocol] = None
         self.connected = False
 
+        # Message skeletons for the fixed-shape sends; each send fills in its fields
+        self._speech_msg = {"type": "receive_speech", "speech": ""}
+        self._done_command_msg = {"type": "done_command", "command_id": "", "status": "", "execution_time": 1.5}
+        self._done_story_msg = {"type": "done_story", "story_id": "", "duration": 30.0, "user_engagement": "high"}
+        self._button_press_msg = {"type": "button_press", "button_type": ""}
+
     async def connect(self):
         """Connect to the WebSocket server"""
         try:
-            self.websocket = await websockets.connect(self.url)
+            # Test messages are tiny JSON frames: per-message DEFLATE costs more CPU than
+            # it saves, and keepalive pings only add timer wakeups to short test runs
+            self.websocket = await websockets.connect(
+                self.url,
+                compression=None,
+                ping_interval=None,
+                max_size=2**20,
+                write_limit=2**20,
+            )
             self.connected = True
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+            timestamp = _ts()
             print(f"[{timestamp}] 📥 WEBSOCKET RECV: connect | Connected to server at {self.url}")
             
             # Start listening for messages
             asyncio.create_task(self._listen_for_messages())
             
         except Exception as e:
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+            timestamp = _ts()
             print(f"[{timestamp}] ❌ Failed to connect: {e}")
             self.connected = False
 
@@ -36,82 +83,94 @@ class TestClient:
         if self.websocket and self.connected:
             await self.websocket.close()
             self.connected = False
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+            timestamp = _ts()
             print(f"[{timestamp}] 📥 WEBSOCKET RECV: disconnect | Disconnected from server")
 
     async def _listen_for_messages(self):
         """Listen for incoming messages from the server"""
         try:
-            async for message in self.websocket:
-                await self._handle_message(message)
+            while True:
+                lines = [self._handle_message(await self.websocket.recv())]
+                # The rest of a burst is already buffered by the protocol; recv() hands
+                # those messages over without another event loop wakeup
+                try:
+                    while self.websocket.messages:
+                        lines.append(self._handle_message(await self.websocket.recv()))
+                finally:
+                    sys.stdout.write("\n".join(lines) + "\n")
+        except websockets.exceptions.ConnectionClosedOK:
+            # A normal close, e.g. after our own disconnect(); nothing to report
+            self.connected = False
         except websockets.exceptions.ConnectionClosed:
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+            timestamp = _ts()
             print(f"[{timestamp}] 📥 WEBSOCKET RECV: disconnect | Connection closed by server")
             self.connected = False
         except Exception as e:
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+            timestamp = _ts()
             print(f"[{timestamp}] ❌ Error listening for messages: {e}")
             self.connected = False
 
-    async def _handle_message(self, raw_message: str):
-        """Handle incoming message from server"""
+    def _handle_message(self, raw_message: str) -> str:
+        """Handle incoming message from server, returning its log line"""
         try:
-            data = json.loads(raw_message)
+            data = json_loads(raw_message)
             message_type = data.get('type', 'unknown')
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            print(f"[{timestamp}] 📥 WEBSOCKET RECV: {message_type} | Data: {data}")
+            timestamp = _ts()
+            return f"[{timestamp}] 📥 WEBSOCKET RECV: {message_type} | Data: {data}"
         except json.JSONDecodeError:
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            print(f"[{timestamp}] ❌ Invalid JSON received: {raw_message}")
+            timestamp = _ts()
+            return f"[{timestamp}] ❌ Invalid JSON received: {raw_message}"
 
     async def send_message(self, message_type: str, data: Dict[str, Any]):
         """Send a message to the server"""
+        await self._send({"type": message_type, **data})
+
+    async def _send(self, message: Dict[str, Any]):
+        """Send a complete message (including its "type") to the server"""
         if not self.connected or not self.websocket:
             print("❌ Not connected to server")
             return
 
-        message = {
-            "type": message_type,
-            **data
-        }
-
+        # Encode and format before awaiting, so a reused template can't change underneath
+        payload = json_dumps(message)
+        sent_line = f"📤 WEBSOCKET SEND: {message['type']} | Data: {message}"
         try:
-            await self.websocket.send(json.dumps(message))
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            print(f"[{timestamp}] 📤 WEBSOCKET SEND: {message_type} | Data: {data}")
+            await self.websocket.send(payload)
+            timestamp = _ts()
+            print(f"[{timestamp}] {sent_line}")
         except Exception as e:
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+            timestamp = _ts()
             print(f"[{timestamp}] ❌ Failed to send message: {e}")
 
     async def send_speech(self, speech_text: str, mode: str = None):
         """Send a speech message to the server"""
-        data = {"speech": speech_text}
+        message = self._speech_msg
+        message["speech"] = speech_text
         if mode:
-            data["mode"] = mode
-        await self.send_message("receive_speech", data)
+            message["mode"] = mode
+        else:
+            message.pop("mode", None)
+        await self._send(message)
 
     async def send_done_command(self, command_id: str, status: str = "completed"):
         """Send a command completion message"""
-        data = {
-            "command_id": command_id,
-            "status": status,
-            "execution_time": 1.5
-        }
-        await self.send_message("done_command", data)
+        message = self._done_command_msg
+        message["command_id"] = command_id
+        message["status"] = status
+        await self._send(message)
 
     async def send_done_story(self, story_id: str, duration: float = None):
         """Send a story completion message"""
-        data = {
-            "story_id": story_id,
-            "duration": duration or 30.0,
-            "user_engagement": "high"
-        }
-        await self.send_message("done_story", data)
+        message = self._done_story_msg
+        message["story_id"] = story_id
+        message["duration"] = duration or 30.0
+        await self._send(message)
 
     async def send_button_press(self, button_type: str):
         """Send a button press message"""
-        data = {"button_type": button_type}
-        await self.send_message("button_press", data)
+        message = self._button_press_msg
+        message["button_type"] = button_type
+        await self._send(message)
 
     async def send_config_update(self, config: Dict[str, Any]):
         """Send a config update message"""
@@ -221,8 +280,6 @@ class InteractiveTestClient:
 
 async def main():
     """Main function - choose between automated or interactive testing"""
-    import sys
-
     if len(sys.argv) > 1 and sys.argv[1] == "--auto":
         # Automated testing
         client = TestClient()
@@ -242,4 +299,6 @@ if __name__ == "__main__":
     # python test_client.py --auto    # Automated test sequence
 
     print("🔧 Smart Glasses Test Client Starting...")
+    if UVLOOP_AVAILABLE:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main())
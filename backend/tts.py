@@ -1,22 +1,83 @@
 import os
-import sys
+import logging
+import hashlib
+import time
 import tempfile
 import asyncio
 import aiohttp
 import random
 import re
+import itertools
+import threading
+import collections
 from pathlib import Path
 from dotenv import load_dotenv
-import sounddevice as sd
-import soundfile as sf
+import numpy as np
+
+# Audio output is optional, so a headless process can import this module for
+# generate_response(). sounddevice raises OSError when PortAudio itself is missing.
+try:
+    import sounddevice as sd
+    import soundfile as sf
+    AUDIO_AVAILABLE = True
+except (ImportError, OSError):
+    AUDIO_AVAILABLE = False
 
 # Load environment variables from .env file
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env"))
 
+# Progress messages are DEBUG and formatted lazily, so at the default level they
+# cost only a level check
+logger = logging.getLogger(__name__)
+
 # --- Configuration ---
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_TTS_ENDPOINT = os.getenv("GROQ_TTS_ENDPOINT", "https://api.groq.com/openai/v1/audio/speech")
+# Compressed audio is several times smaller than WAV to download and to keep in the
+# disk cache; soundfile (libsndfile >= 1.1) decodes it
+RESPONSE_FORMAT = os.getenv("GROQ_TTS_FORMAT", "mp3")
 MODEL = "playai-tts"  # Groq's TTS model
+# Synthesized audio is kept across runs, named by a hash of model, voice and text
+TTS_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "sleep-assistant" / "tts"
+# clean_up() removes cached clips that haven't been used for this many days
+TTS_CACHE_MAX_AGE_DAYS = 30
+# ...and temp files of downloads that stopped this long ago (an unfinished download
+# this old is long dead, but a younger one may belong to another running process)
+PARTIAL_MAX_AGE_SECONDS = 60 * 60
+# Memory budget for decoded audio of the most recently spoken texts. float32 at
+# 48 kHz is ~190 KB per second of speech, so this holds a few minutes of short
+# phrases; the least recently spoken clips are evicted first.
+PCM_CACHE_MAX_BYTES = 32 * 1024 * 1024
+# Clips longer than this are streamed from disk without being kept in memory
+PCM_CACHE_MAX_SECONDS = 10
+# Bytes read from the TTS response per chunk while saving it
+DOWNLOAD_CHUNK_SIZE = 16384
+# Downloads are written to "<cache file>.<random>.part" and renamed when complete
+PARTIAL_SUFFIX = ".part"
+# Names clean_up() may delete: "<sha256>.<format>" clips and their temp files. Anything
+# else in the cache directory is left alone.
+_CACHE_FILE_RE = re.compile(r"[0-9a-f]{64}\.\w+(?P<partial>\.\w+\.part)?")
+# Sentences of one reply synthesized concurrently
+MAX_CONCURRENT_SYNTHESES = 4
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+# Sentences shorter than this are sent together with the ones after them, so a
+# reply like "Okay. Sure! Here you go." costs one request instead of three
+MIN_SYNTHESIS_CHARS = 40
+# Long replies that look like stories are cut to this many words before synthesis
+STORY_MAX_WORDS = 100
+_STORY_RE = re.compile(r"once upon a time|story|tale", re.IGNORECASE)
+# Playback writes this many chunks per second of audio, checking for interruption
+# between them
+PLAYBACK_CHUNKS_PER_SECOND = 20
+# The output stream is opened at this rate in the background when a TTSManager is
+# created, so the first reply doesn't wait on the device; clips at another rate
+# reopen it
+PLAYBACK_SAMPLE_RATE = int(os.getenv("TTS_PLAYBACK_SAMPLE_RATE", "48000"))
+# Output stream buffering. Smaller blocks and "low" latency start audio sooner after
+# a write but leave less slack before an underrun (audible clicks) if the playback
+# thread is late; raise them on devices that crackle.
+PLAYBACK_BLOCKSIZE = 1024
+PLAYBACK_LATENCY = "low"
 VOICE = "Arista-PlayAI"  # Default voice - warm and conversational
 
 # Available voices for playai-tts model
@@ -27,6 +88,35 @@ VOICES = {
     "soothing": ["Sammy-PlayAI", "Ivy-PlayAI"]
 }
 
+def _split_sentences(text: str) -> list:
+    """Splits text after sentence-ending punctuation, dropping empty pieces."""
+    return [sentence for sentence in _SENTENCE_END_RE.split(text.strip()) if sentence]
+
+def _batch_sentences(sentences: list) -> list:
+    """Joins consecutive short sentences into pieces of at least MIN_SYNTHESIS_CHARS.
+
+    Sentences that are long enough on their own are never merged, so batching
+    doesn't make any piece much longer to synthesize.
+    """
+    pieces = []
+    pending = []
+    pending_chars = 0
+    for sentence in sentences:
+        if pending and len(sentence) >= MIN_SYNTHESIS_CHARS:
+            # Don't let a run of short sentences delay a long one behind them
+            pieces.append(" ".join(pending))
+            pending = []
+            pending_chars = 0
+        pending.append(sentence)
+        pending_chars += len(sentence)
+        if pending_chars >= MIN_SYNTHESIS_CHARS:
+            pieces.append(" ".join(pending))
+            pending = []
+            pending_chars = 0
+    if pending:
+        pieces.append(" ".join(pending))
+    return pieces
+
 class TTSManager:
     """Manages text-to-speech operations using Groq's TTS API."""
 
@@ -42,89 +132,305 @@ class TTSManager:
             str: Path to the generated audio file or empty string if failed
         """
         if not GROQ_API_KEY:
-            print("Error: GROQ_API_KEY is not set.", file=sys.stderr)
+            logger.error("GROQ_API_KEY is not set.")
             return ""
 
         if not text or not text.strip():
-            print("Error: Empty text provided for TTS.", file=sys.stderr)
+            logger.error("Empty text provided for TTS.")
             return ""
 
-        print(f"Generating speech for: {text}", file=sys.stderr)
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        logger.debug("Generating speech for: %s", text)
 
         try:
-            # Create a unique filename for this audio
-            output_path = Path(self.temp_dir) / f"tts_{hash(text)}.wav"
-
-            async with aiohttp.ClientSession() as session:
-                form_data = {
-                    "model": self.model,
-                    "voice": self.voice,
-                    "input": text,
-                    "response_format": "wav"
-                }
-
-                async with session.post(
-                    GROQ_TTS_ENDPOINT,
-                    headers=headers,
-                    json=form_data
-                ) as resp:
-                    if resp.status != 200:
-                        error_text = await resp.text()
-                        print(f"Error: API request failed with status {resp.status}", file=sys.stderr)
-                        print(f"Response: {error_text}", file=sys.stderr)
-
-                        # Check for terms acceptance error
-                        if "terms acceptance" in error_text and "model_terms_required" in error_text:
-                            print("\nIMPORTANT: You need to accept the terms for the TTS model.", file=sys.stderr)
-                            print("Please visit https://console.groq.com/playground?model=playai-tts", file=sys.stderr)
-                            print("Log in with your Groq account and accept the terms of use.", file=sys.stderr)
-
-                        return ""
-
-                    # Save the audio data to a file
-                    audio_data = await resp.read()
-                    with open(output_path, "wb") as f:
-                        f.write(audio_data)
-
-                    print(f"Speech generated successfully: {output_path}", file=sys.stderr)
-                    return str(output_path)
+            # Same model, voice and text means the same audio, so a hit skips the API
+            output_path = self.cache_dir / f"{self._cache_key(text)}.{RESPONSE_FORMAT}"
+            if output_path.exists():
+                logger.debug("Using cached speech: %s", output_path)
+                return str(output_path)
+
+            session = await self._get_session()
+            form_data = {
+                "model": self.model,
+                "voice": self.voice,
+                "input": text,
+                "response_format": RESPONSE_FORMAT
+            }
+
+            async with session.post(GROQ_TTS_ENDPOINT, json=form_data) as resp:
+                if resp.status != 200:
+                    error_text = await resp.text()
+                    logger.error("API request failed with status %s", resp.status)
+                    logger.error("Response: %s", error_text)
+
+                    # Check for terms acceptance error
+                    if "terms acceptance" in error_text and "model_terms_required" in error_text:
+                        logger.error(
+                            "You need to accept the terms for the TTS model. "
+                            "Please visit https://console.groq.com/playground?model=playai-tts, "
+                            "log in with your Groq account and accept the terms of use."
+                        )
+
+                    return ""
+
+                # Stream the audio to disk as it arrives rather than holding the whole
+                # body in memory. It lands under a temporary name and is renamed once
+                # complete, so a dropped download never leaves a truncated cache entry.
+                # The name is unique per download, so concurrent writers of the same
+                # key (in this process or another) never share a file.
+                with tempfile.NamedTemporaryFile(
+                    dir=self.cache_dir, prefix=f"{output_path.name}.", suffix=PARTIAL_SUFFIX, delete=False
+                ) as f:
+                    partial_path = f.name
+                    try:
+                        async for chunk in resp.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                    except BaseException:
+                        f.close()
+                        os.remove(partial_path)
+                        raise
+                os.replace(partial_path, output_path)
+
+                logger.debug("Speech generated successfully: %s", output_path)
+                return str(output_path)
 
         except aiohttp.ClientError as e:
-            print(f"Network error connecting to Groq API: {e}", file=sys.stderr)
+            logger.error("Network error connecting to Groq API: %s", e)
             return ""
         except Exception as e:
-            print(f"An unexpected error occurred: {e}", file=sys.stderr)
+            logger.error("An unexpected error occurred: %s", e)
             return ""
 
-    def __init__(self, model=MODEL, voice=VOICE):
+    def __init__(self, model=MODEL, voice=VOICE, blocksize=PLAYBACK_BLOCKSIZE, latency=PLAYBACK_LATENCY):
         self.model = model
         self.voice = voice
-        self.temp_dir = tempfile.mkdtemp(prefix="groq_tts_")
+        # Passed to the output stream; latency is "low", "high" or seconds
+        self.blocksize = blocksize
+        self.latency = latency
+        self.cache_dir = TTS_CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.is_playing = False  # Track playback status
-        self.interrupted = False  # Track if playback was interrupted
+        # Set by stop_playback(); checked by the playback thread between chunks
+        self._interrupt = threading.Event()
+        self._session = None  # Keep-alive HTTP session, created on first use
+        # cache key -> (samples, samplerate), least recently spoken first
+        self._pcm_cache = collections.OrderedDict()
+        self._pcm_cache_bytes = 0  # Total size of the cached samples
+        self._synthesis_slots = asyncio.Semaphore(MAX_CONCURRENT_SYNTHESES)
+        # Output stream kept open across clips; guarded by _stream_lock because it is
+        # first opened on a background thread
+        self._stream = None
+        self._stream_lock = threading.Lock()
+        # Held by the playback thread while it writes a clip, so close() never stops
+        # the stream underneath a blocking write
+        self._playback_lock = threading.Lock()
+        if AUDIO_AVAILABLE:
+            threading.Thread(target=self._warm_up_stream, daemon=True).start()
 
         # Validate environment
         if not GROQ_API_KEY:
-            print("Error: GROQ_API_KEY is not set.", file=sys.stderr)
+            logger.error("GROQ_API_KEY is not set.")
+
+    def _cache_key(self, text: str) -> str:
+        """Stable cache key for text in this manager's model and voice.
+
+        Unlike hash(), SHA-256 isn't salted per process, so keys match across runs.
+        """
+        normalized = " ".join(text.split()).lower()
+        return hashlib.sha256(f"{self.model}|{self.voice}|{normalized}".encode("utf-8")).hexdigest()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Returns the manager's pooled HTTP session, creating it on first use.
+
+        One keep-alive session per TTSManager means the TCP + TLS handshake to Groq
+        is paid once, not on every generate_speech call.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=8, keepalive_timeout=75, ttl_dns_cache=300),
+                headers={"Authorization": f"Bearer {GROQ_API_KEY}"},
+            )
+        return self._session
+
+    async def close(self):
+        """Closes the pooled HTTP session and the output stream."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        # A cancelled speak() leaves its playback thread running until the next chunk
+        # boundary; stop it there, and let _close_stream wait for it
+        self._interrupt.set()
+        await asyncio.to_thread(self._close_stream)
+
+    def _output_stream(self, samplerate: int, channels: int):
+        """Returns a started float32 output stream for the given format.
+
+        The open stream is reused when the format matches, so only the first clip
+        (or a change of sample rate) pays for opening the device.
+        """
+        with self._stream_lock:
+            stream = self._stream
+            if stream is None or stream.closed or stream.samplerate != samplerate or stream.channels != channels:
+                if stream is not None:
+                    stream.close()
+                stream = self._stream = sd.OutputStream(
+                    samplerate=samplerate, channels=channels, dtype='float32',
+                    blocksize=self.blocksize, latency=self.latency,
+                )
+            if stream.stopped:
+                stream.start()
+                # Start on a block of silence so the device doesn't underrun while the
+                # first real block is still being decoded
+                stream.write(np.zeros((max(1, samplerate // PLAYBACK_CHUNKS_PER_SECOND), channels), dtype='float32'))
+            return stream
+
+    def _warm_up_stream(self):
+        """Opens the output stream ahead of the first reply; runs on a background thread."""
+        try:
+            self._output_stream(PLAYBACK_SAMPLE_RATE, 1)
+        except Exception as e:
+            logger.debug("Could not open the output stream ahead of playback: %s", e)
+
+    def _close_stream(self):
+        """Waits for the playback thread to let go of the stream, lets queued audio
+        finish playing, then closes the output stream."""
+        with self._playback_lock, self._stream_lock:
+            stream, self._stream = self._stream, None
+        if stream is not None and not stream.closed:
+            if not stream.stopped:
+                stream.stop()
+            stream.close()
 
     def stop_playback(self):
-        """Stops any currently playing audio."""
+        """Stops any currently playing audio.
+
+        The playback thread aborts its stream at the next chunk boundary, so this
+        returns immediately instead of waiting for the audio to stop.
+        """
+        self._interrupt.set()
+        if self.is_playing:
+            logger.debug("Audio playback stopped.")
+        return True
+
+    def _write_blocks(self, stream, blocks) -> bool:
+        """Writes audio blocks to an output stream, aborting it if stop_playback() is called.
+
+        An aborted stream drops its queued audio and is restarted for the next clip.
+
+        Returns:
+            bool: True if every block was written, False if playback was interrupted
+        """
+        for block in blocks:
+            if self._interrupt.is_set():
+                stream.abort()
+                return False
+            stream.write(block)
+        return True
+
+    def _play_blocking(self, data, samplerate: int) -> bool:
+        """Plays decoded samples on the shared output stream; runs on a worker thread.
+
+        Returns:
+            bool: True if the audio played to the end, False if stop_playback() cut it short
+        """
+        channels = data.shape[1] if data.ndim > 1 else 1
+        chunk = max(1, samplerate // PLAYBACK_CHUNKS_PER_SECOND)
+        data = data.astype(np.float32, copy=False)
+        blocks = (data[start:start + chunk] for start in range(0, len(data), chunk))
+        with self._playback_lock:
+            return self._write_blocks(self._output_stream(samplerate, channels), blocks)
+
+    def _play_file_blocking(self, audio_path: str):
+        """Decodes and plays an audio file block by block; runs on a worker thread.
+
+        Playback starts after the first block decodes, and a long clip is never held
+        in memory whole.
+
+        Returns:
+            tuple: (completed, audio), where audio is the decoded (samples, samplerate)
+                for the PCM cache, or None if the clip is too long to keep or didn't finish
+        """
+        with sf.SoundFile(audio_path) as snd:
+            logger.debug("Playing audio (duration: %.2fs)", snd.frames / snd.samplerate)
+            chunk = max(1, snd.samplerate // PLAYBACK_CHUNKS_PER_SECOND)
+            kept = [] if snd.frames <= PCM_CACHE_MAX_SECONDS * snd.samplerate else None
+
+            def blocks():
+                # float32, because output streams don't take float64
+                for block in snd.blocks(blocksize=chunk, dtype='float32'):
+                    if kept is not None:
+                        kept.append(block)
+                    yield block
+
+            with self._playback_lock:
+                stream = self._output_stream(snd.samplerate, snd.channels)
+                completed = self._write_blocks(stream, blocks())
+
+        if completed and kept:
+            return True, (np.concatenate(kept), snd.samplerate)
+        return completed, None
+
+    async def _load_audio(self, text: str):
+        """Finds or synthesizes the audio for text.
+
+        Returns:
+            tuple: (key, audio), where audio is decoded (samples, samplerate) from the
+                PCM cache or the path of the synthesized file; None if speech couldn't
+                be generated
+        """
+        # Repeated phrases come straight from memory, skipping both the API call and
+        # the decode
+        key = self._cache_key(text)
+        cached = self._pcm_cache.get(key)
+        if cached is not None:
+            self._pcm_cache.move_to_end(key)
+            return key, cached
+
+        async with self._synthesis_slots:
+            audio_path = await self.generate_speech(text)
+        if not audio_path:
+            logger.error("Could not generate speech audio. See error above.")
+            return None
+        return key, audio_path
+
+    def _cache_pcm(self, key: str, decoded):
+        """Adds decoded audio to the PCM cache, evicting the least recently spoken clips to stay within PCM_CACHE_MAX_BYTES."""
+        previous = self._pcm_cache.pop(key, None)
+        if previous is not None:
+            self._pcm_cache_bytes -= previous[0].nbytes
+        self._pcm_cache[key] = decoded
+        self._pcm_cache_bytes += decoded[0].nbytes
+        while self._pcm_cache_bytes > PCM_CACHE_MAX_BYTES and len(self._pcm_cache) > 1:
+            _, (evicted, _) = self._pcm_cache.popitem(last=False)
+            self._pcm_cache_bytes -= evicted.nbytes
+
+    async def _play(self, key: str, audio) -> bool:
+        """Plays cached samples or streams a synthesized file, returning False if it was interrupted or failed."""
         try:
-            self.interrupted = True  # Set interrupted flag first
-            if self.is_playing:
-                sd.stop()
+            # Playback (and decoding) blocks a worker thread, not the event loop, and
+            # nothing polls while it runs
+            self.is_playing = True
+            try:
+                if isinstance(audio, str):
+                    completed, decoded = await asyncio.to_thread(self._play_file_blocking, audio)
+                    if decoded is not None:
+                        self._cache_pcm(key, decoded)
+                else:
+                    data, samplerate = audio
+                    logger.debug("Playing audio (duration: %.2fs)", len(data) / samplerate)
+                    completed = await asyncio.to_thread(self._play_blocking, data, samplerate)
+            except asyncio.CancelledError:
+                # The thread can't be cancelled; tell it to stop at the next chunk
+                self._interrupt.set()
+                raise
+            finally:
                 self.is_playing = False
-                print("Audio playback stopped.", file=sys.stderr)
-                # Force a small delay to ensure audio is fully stopped
-                import time
-                time.sleep(0.1)
-            return True
-        except Exception as e:
-            print(f"Error stopping audio: {e}", file=sys.stderr)
+
+            if not completed:
+                logger.debug("TTS interrupted during playback")
+            return completed
+
+        except Exception as audio_err:
+            logger.error("Error playing audio: %s", audio_err)
             return False
 
     async def speak(self, text: str) -> bool:
@@ -136,65 +442,146 @@ class TTSManager:
         Returns:
             bool: True if successful, False otherwise
         """
+        if not AUDIO_AVAILABLE:
+            logger.error("sounddevice/soundfile are not available; can't play speech.")
+            return False
+
         try:
             # Reset interruption flag
-            self.interrupted = False
+            self._interrupt.clear()
 
             # Preprocess text to be shorter for stories
-            if len(text) > 300 and any(word in text.lower() for word in ["once upon a time", "story", "tale"]):
-                print("Detected story - using shorter format", file=sys.stderr)
-                text = " ".join(text.split()[:100]) + "..."
-
-            # Generate speech for the complete text
-            print(f"Generating speech for text", file=sys.stderr)
-            audio_path = await self.generate_speech(text)
-            if not audio_path or audio_path == "":
-                print("Could not generate speech audio. See error above.", file=sys.stderr)
-                return False
-
-            # Play the audio file with interruption checking
+            if len(text) > 300 and _STORY_RE.search(text):
+                logger.debug("Detected story - using shorter format")
+                # maxsplit stops splitting after the words we keep
+                text = " ".join(text.split(maxsplit=STORY_MAX_WORDS)[:STORY_MAX_WORDS]) + "..."
+
+            # Each sentence (short ones batched together) is synthesized on its own
+            # and all the requests start at once (bounded by _synthesis_slots), so
+            # the first sentence plays while later ones are still being generated
+            pieces = _batch_sentences(_split_sentences(text))
+            logger.debug("Generating speech for text (%d pieces)", len(pieces))
+            # A piece repeated within the reply is synthesized once and played from
+            # the same task each time
+            tasks = {}
+            loads = []
+            for piece in pieces:
+                if piece not in tasks:
+                    tasks[piece] = asyncio.create_task(self._load_audio(piece))
+                loads.append(tasks[piece])
             try:
-                data, samplerate = sf.read(audio_path)
-
-                # Calculate duration for logging
-                duration = len(data) / samplerate
-                print(f"Playing audio (duration: {duration:.2f}s)", file=sys.stderr)
-
-                self.is_playing = True
-                sd.play(data, samplerate)
-
-                # Wait for playback with frequent interruption checks
-                import time
-                start_time = time.time()
-                while sd.get_stream().active and time.time() - start_time < duration + 0.5:
-                    if self.interrupted:
-                        sd.stop()
-                        print("TTS interrupted during playback", file=sys.stderr)
+                for load in loads:
+                    loaded = await load
+                    if loaded is None or not await self._play(*loaded):
                         return False
-                    await asyncio.sleep(0.1)  # Small sleep to allow interruption
-
-                self.is_playing = False
                 return True
-
-            except Exception as audio_err:
-                print(f"Error playing audio: {audio_err}", file=sys.stderr)
-                self.is_playing = False
-                return False
+            finally:
+                # Drop synthesis of sentences that won't be played
+                for load in loads:
+                    load.cancel()
 
         except Exception as e:
-            print(f"Failed to speak: {e}", file=sys.stderr)
+            logger.error("Failed to speak: %s", e)
             self.is_playing = False
             return False
 
     def clean_up(self):
-        """Removes temporary audio files."""
-        import shutil
+        """Prunes cached audio that hasn't been used in TTS_CACHE_MAX_AGE_DAYS.
+
+        Recently spoken clips stay, so the next run still gets cache hits. Temp files
+        left by interrupted downloads go once they're PARTIAL_MAX_AGE_SECONDS old.
+        """
+        now = time.time()
+        clip_cutoff = now - TTS_CACHE_MAX_AGE_DAYS * 24 * 60 * 60
+        partial_cutoff = now - PARTIAL_MAX_AGE_SECONDS
+        removed = 0
         try:
-            if os.path.exists(self.temp_dir):
-                shutil.rmtree(self.temp_dir)
-                print(f"Cleaned up temporary TTS files from {self.temp_dir}", file=sys.stderr)
-        except Exception as e:
-            print(f"Failed to clean up TTS temp files: {e}", file=sys.stderr)
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    match = _CACHE_FILE_RE.fullmatch(entry.name)
+                    if not match:
+                        continue
+                    cutoff = partial_cutoff if match.group("partial") else clip_cutoff
+                    try:
+                        stat = entry.stat()
+                        # Many filesystems are mounted relatime, so atime alone can lag
+                        if max(stat.st_atime, stat.st_mtime) < cutoff:
+                            os.remove(entry.path)
+                            removed += 1
+                    except FileNotFoundError:
+                        pass  # Replaced or pruned by another process meanwhile
+            logger.debug("Removed %d stale TTS cache files from %s", removed, self.cache_dir)
+        except OSError as e:
+            logger.error("Failed to clean up the TTS cache: %s", e)
+
+# Canned replies for generate_response, keyed by intent. Each pool is shuffled once
+# at import and then rotated, so picking a reply is a next() rather than a fresh
+# list plus a random.choice on every call.
+_RESPONSES = {
+    "greeting": (
+        "Hello there! How can I assist you today?",
+        "Hi! I'm your AI assistant. What can I do for you?",
+        "Hey! It's great to talk with you. How can I help?"
+    ),
+    "capabilities": (
+        "I can help with answering questions, providing information, or just having a conversation. What would you like to talk about?",
+    ),
+    "weather": (
+        "I don't have real-time weather data, but I'd be happy to discuss other topics!",
+        "I can't check the weather right now, but I'm here to chat about other things.",
+        "While I can't access weather information, I can help with many other questions you might have."
+    ),
+    "time": (
+        "I don't have access to the current time, but I'm still here to help with other questions!",
+        "I can't tell you the exact time, but I'm ready to assist with other topics.",
+        "While I can't check the time for you, I'd be happy to chat about something else."
+    ),
+    "feelings": (
+        "I'm doing well, thanks for asking! How about you?",
+        "I'm operating normally and ready to help. How are you today?",
+        "I'm great! It's nice of you to ask. How can I assist you?"
+    ),
+    "thanks": (
+        "You're welcome! Is there anything else I can help with?",
+        "Happy to help! Let me know if you need anything else.",
+        "No problem at all! What else would you like to talk about?"
+    ),
+    "goodbye": (
+        "Goodbye! Feel free to chat again anytime.",
+        "See you later! It was nice talking with you.",
+        "Take care! I'll be here if you need me again."
+    ),
+    # %-templates for unrecognized inputs, filled with what the user said
+    "default": (
+        "I heard you say: '%s'. How can I help with that?",
+        "I understood you said: '%s'. What would you like to know about this?",
+        "You mentioned: '%s'. Could you tell me more about what you're looking for?"
+    ),
+}
+_RESPONSE_CYCLES = {
+    intent: itertools.cycle(random.sample(pool, len(pool)))
+    for intent, pool in _RESPONSES.items()
+}
+
+# Trigger phrases per canned intent. They are compiled into one case-insensitive
+# pattern with a named group per intent, so a single regex search classifies the
+# input; the intent whose phrase appears earliest in the text wins.
+_INTENT_PHRASES = {
+    "greeting": ("hello", "hi", "hey", "greetings"),
+    "capabilities": ("what can you do", "help me with", "your capabilities"),
+    "weather": ("weather",),
+    "time": ("time",),
+    "feelings": ("how are you", "how do you feel", "are you well"),
+    "thanks": ("thank you", "thanks", "appreciate it"),
+    "goodbye": ("goodbye", "bye", "see you", "talk to you later"),
+}
+_INTENT_RE = re.compile(
+    "|".join(
+        rf"(?P<{intent}>\b(?:{'|'.join(map(re.escape, phrases))})\b)"
+        for intent, phrases in _INTENT_PHRASES.items()
+    ),
+    re.IGNORECASE,
+)
 
 # Helper function for generating natural-sounding responses
 def generate_response(intent: str) -> str:
@@ -206,75 +593,18 @@ def generate_response(intent: str) -> str:
     Returns:
         str: A natural-sounding response text
     """
-    # Map of patterns to friendly responses
-    intent_lower = intent.lower().strip()
-
-    # Greeting patterns
-    if any(greeting in intent_lower for greeting in ["hello", "hi", "hey", "greetings"]):
-        responses = [
-            "Hello there! How can I assist you today?",
-            "Hi! I'm your AI assistant. What can I do for you?",
-            "Hey! It's great to talk with you. How can I help?"
-        ]
-        return random.choice(responses)
-
-    # Questions about capabilities
-    elif any(phrase in intent_lower for phrase in ["what can you do", "help me with", "your capabilities"]):
-        return "I can help with answering questions, providing information, or just having a conversation. What would you like to talk about?"
-
-    # Weather-related
-    elif "weather" in intent_lower:
-        responses = [
-            "I don't have real-time weather data, but I'd be happy to discuss other topics!",
-            "I can't check the weather right now, but I'm here to chat about other things.",
-            "While I can't access weather information, I can help with many other questions you might have."
-        ]
-        return random.choice(responses)
-
-    # Time-related
-    elif "time" in intent_lower:
-        responses = [
-            "I don't have access to the current time, but I'm still here to help with other questions!",
-            "I can't tell you the exact time, but I'm ready to assist with other topics.",
-            "While I can't check the time for you, I'd be happy to chat about something else."
-        ]
-        return random.choice(responses)
-
-    # Feelings/emotions
-    elif any(phrase in intent_lower for phrase in ["how are you", "how do you feel", "are you well"]):
-        responses = [
-            "I'm doing well, thanks for asking! How about you?",
-            "I'm operating normally and ready to help. How are you today?",
-            "I'm great! It's nice of you to ask. How can I assist you?"
-        ]
-        return random.choice(responses)
-
-    # Thanks
-    elif any(phrase in intent_lower for phrase in ["thank you", "thanks", "appreciate it"]):
-        responses = [
-            "You're welcome! Is there anything else I can help with?",
-            "Happy to help! Let me know if you need anything else.",
-            "No problem at all! What else would you like to talk about?"
-        ]
-        return random.choice(responses)
-
-    # Goodbye
-    elif any(phrase in intent_lower for phrase in ["goodbye", "bye", "see you", "talk to you later"]):
-        responses = [
-            "Goodbye! Feel free to chat again anytime.",
-            "See you later! It was nice talking with you.",
-            "Take care! I'll be here if you need me again."
-        ]
-        return random.choice(responses)
+    # _INTENT_RE matches case-insensitively itself, so the text isn't lowercased
+    # or casefolded into a copy first
+    match = _INTENT_RE.search(intent)
+    if match:
+        return next(_RESPONSE_CYCLES[match.lastgroup])
 
     # Default responses for unrecognized inputs
-    else:
-        responses = [
-            f"I heard you say: '{intent}'. How can I help with that?",
-            f"I understood you said: '{intent}'. What would you like to know about this?",
-            f"You mentioned: '{intent}'. Could you tell me more about what you're looking for?"
-        ]
-        return random.choice(responses)
+    return next(_RESPONSE_CYCLES["default"]) % (intent,)
+
+def _latency(value: str):
+    """Parses --latency: a PortAudio preset name or a number of seconds."""
+    return value if value in ("low", "high") else float(value)
 
 async def main():
     """Example usage of the TTS module."""
@@ -284,13 +614,18 @@ async def main():
     parser.add_argument("-t", "--text", type=str, help="Text to convert to speech")
     parser.add_argument("-v", "--voice", type=str, default=VOICE, help="Voice to use")
     parser.add_argument("-m", "--model", type=str, default=MODEL, help="Model to use")
+    parser.add_argument("--blocksize", type=int, default=PLAYBACK_BLOCKSIZE,
+                        help="Output stream block size in frames (0 lets PortAudio choose)")
+    parser.add_argument("--latency", type=_latency, default=PLAYBACK_LATENCY,
+                        help='Output latency: "low", "high" or seconds')
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
 
     if not args.text:
         parser.print_help()
         return
 
-    tts = TTSManager(model=args.model, voice=args.voice)
+    tts = TTSManager(model=args.model, voice=args.voice, blocksize=args.blocksize, latency=args.latency)
 
     try:
         success = await tts.speak(args.text)
@@ -299,6 +634,7 @@ async def main():
         else:
             print("Failed to generate or play speech.")
     finally:
+        await tts.close()
         tts.clean_up()
 
 if __name__ == "__main__":